@@ -23,3 +23,8 @@ application = ProtocolTypeRouter({
         )
     ),
 })
+
+from common.registry import preload_models, start_reload_watcher, start_warmup
+preload_models()
+start_warmup()
+start_reload_watcher()
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     'text',
     'chatbot',
     'monitoring',
+    'common',
     'channels',
 ]
 
@@ -160,6 +161,96 @@ REST_FRAMEWORK = {
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development
 CORS_ALLOW_CREDENTIALS = True
 
+# Micro-batching of concurrent frames for the Keras video models (timeout: seconds a request waits for its result)
+VIDEO_BATCH_MAX_SIZE = int(os.environ.get('VIDEO_BATCH_MAX_SIZE', 16))
+VIDEO_BATCH_MAX_WAIT_MS = float(os.environ.get('VIDEO_BATCH_MAX_WAIT_MS', 10))
+VIDEO_BATCH_TIMEOUT = float(os.environ.get('VIDEO_BATCH_TIMEOUT', 30))
+
+# Backend for the brainrot and deepfake video models: 'keras', or 'onnx' for the graphs
+# written by `manage.py export_onnx` (falls back to Keras if they are missing)
+VIDEO_MODEL_BACKEND = os.environ.get('VIDEO_MODEL_BACKEND', 'keras')
+
+# ONNX Runtime thread pools (0 lets ONNX Runtime pick)
+ONNX_INTRA_OP_THREADS = int(os.environ.get('ONNX_INTRA_OP_THREADS', 0))
+ONNX_INTER_OP_THREADS = int(os.environ.get('ONNX_INTER_OP_THREADS', 1))
+
+# Modalities served by this process; routes and models of the others are never loaded
+ENABLED_MODALITIES = [
+    modality.strip() for modality in os.environ.get('ENABLED_MODALITIES', 'video,audio,text,image').split(',')
+    if modality.strip()
+]
+
+# Models loaded in the background when the server starts ('all' or model names); others load on first use
+WARMUP_MODELS = [name.strip() for name in os.environ.get('WARMUP_MODELS', '').split(',') if name.strip()]
+
+# Models loaded in the parent process before a pre-forking server (gunicorn --preload) forks its
+# workers, so their weights are shared copy-on-write ('all' or model names; Keras, ONNX Runtime and
+# CLIP models are skipped). Only set it when the application is imported before the fork: the
+# warmup and reload threads then start in the workers only
+PRELOAD_MODELS = [name.strip() for name in os.environ.get('PRELOAD_MODELS', '').split(',') if name.strip()]
+
+# Seconds between checks of loaded models' weight files for hot reload (0 disables)
+MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', 0))
+
+# Per-model weight precision, e.g. MODEL_PRECISION="roberta=int8,hubert=int8" (unlisted models stay fp32).
+# Names: roberta, audio_rnn, hubert, clip, brainrot, deepfake, nudity
+MODEL_PRECISION = dict(
+    item.strip().split('=', 1) for item in os.environ.get('MODEL_PRECISION', '').split(',') if '=' in item
+)
+
+# Content-hash cache of image/frame classification results (TTL in seconds, 0 disables expiry)
+FRAME_CACHE_MAX_ENTRIES = int(os.environ.get('FRAME_CACHE_MAX_ENTRIES', 4096))
+FRAME_CACHE_TTL = float(os.environ.get('FRAME_CACHE_TTL', 0)) or None
+
+# Per-stream state kept for live video (flash tracking etc.)
+VIDEO_STREAM_MAX = int(os.environ.get('VIDEO_STREAM_MAX', 1024))
+VIDEO_STREAM_TTL = float(os.environ.get('VIDEO_STREAM_TTL', 300))
+
+# Near-duplicate frame skipping: max dHash bit distance, and forced refresh interval in frames
+VIDEO_DEDUP_MAX_DISTANCE = int(os.environ.get('VIDEO_DEDUP_MAX_DISTANCE', 4))
+VIDEO_DEDUP_REFRESH_EVERY = int(os.environ.get('VIDEO_DEDUP_REFRESH_EVERY', 10))
+
+# Write-behind buffering of deepfake detections
+DEEPFAKE_WRITE_QUEUE_SIZE = int(os.environ.get('DEEPFAKE_WRITE_QUEUE_SIZE', 1000))
+DEEPFAKE_WRITE_BATCH_SIZE = int(os.environ.get('DEEPFAKE_WRITE_BATCH_SIZE', 50))
+DEEPFAKE_WRITE_INTERVAL = float(os.environ.get('DEEPFAKE_WRITE_INTERVAL', 1.0))
+
+# Background video analysis jobs (spool directory, worker processes, and seconds a job is kept after its last update)
+VIDEO_JOBS_DIR = os.environ.get('VIDEO_JOBS_DIR', str(BASE_DIR / 'video_jobs'))
+VIDEO_JOB_WORKERS = int(os.environ.get('VIDEO_JOB_WORKERS', 2))
+VIDEO_JOB_TTL = float(os.environ.get('VIDEO_JOB_TTL', 24 * 3600))
+
+# Batched RoBERTa inference in classify_text: messages per forward pass, and whether to batch by length
+TEXT_BATCH_SIZE = int(os.environ.get('TEXT_BATCH_SIZE', 32))
+TEXT_SORT_BY_LENGTH = os.environ.get('TEXT_SORT_BY_LENGTH', 'True') == 'True'
+
+# Per-message RoBERTa result cache (TTL in seconds, 0 disables expiry)
+TEXT_CACHE_MAX_ENTRIES = int(os.environ.get('TEXT_CACHE_MAX_ENTRIES', 10000))
+TEXT_CACHE_TTL = float(os.environ.get('TEXT_CACHE_TTL', 0)) or None
+
+# Long messages: classify overlapping 128-token windows (overlap in tokens, at most
+# TEXT_MAX_WINDOWS per message) and aggregate them with 'max' or 'mean'; False truncates
+TEXT_LONG_INPUT = os.environ.get('TEXT_LONG_INPUT', 'True') == 'True'
+TEXT_WINDOW_OVERLAP = int(os.environ.get('TEXT_WINDOW_OVERLAP', 32))
+TEXT_MAX_WINDOWS = int(os.environ.get('TEXT_MAX_WINDOWS', 16))
+TEXT_WINDOW_AGGREGATE = os.environ.get('TEXT_WINDOW_AGGREGATE', 'max')
+
+# Remote Gemini classification in classify_text: endpoint (point it at a stub server for testing),
+# per-call HTTP timeout, response deadline after which the result is reported as pending, and pool size
+GEMINI_API_URL = os.environ.get(
+    'GEMINI_API_URL',
+    'https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent'
+)
+GEMINI_TIMEOUT = float(os.environ.get('GEMINI_TIMEOUT', 30))
+GEMINI_DEADLINE = float(os.environ.get('GEMINI_DEADLINE', 10))
+GEMINI_MAX_WORKERS = int(os.environ.get('GEMINI_MAX_WORKERS', 8))
+
+# Gemini result cache (TTL in seconds) and circuit breaker (consecutive failures to open, cooldown in seconds)
+GEMINI_CACHE_MAX_ENTRIES = int(os.environ.get('GEMINI_CACHE_MAX_ENTRIES', 1024))
+GEMINI_CACHE_TTL = float(os.environ.get('GEMINI_CACHE_TTL', 300)) or None
+GEMINI_BREAKER_FAILURES = int(os.environ.get('GEMINI_BREAKER_FAILURES', 5))
+GEMINI_BREAKER_COOLDOWN = float(os.environ.get('GEMINI_BREAKER_COOLDOWN', 30))
+
 # Login URL configuration
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/monitoring/'
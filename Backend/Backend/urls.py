@@ -5,12 +5,16 @@ from django.conf.urls.static import static
 from chatbot import views as chatbot_views
 from monitoring import views as monitoring_views
 
-urlpatterns = [
+# Only modalities enabled for this process are routed, so the others' views and models are never imported
+modality_patterns = [
+    path(f'{modality}/', include(f'{modality}.urls'))
+    for modality in ('video', 'image', 'text', 'audio')
+    if modality in settings.ENABLED_MODALITIES
+]
+
+urlpatterns = modality_patterns + [
     path('admin/', admin.site.urls),
-    path('video/', include('video.urls')),
-    path('image/', include('image.urls')),
-    path('text/', include('text.urls')),
-    path('audio/', include('audio.urls')),
+    path('models/', include('common.urls')),
     path('chatbot/', chatbot_views.chatbot_view, name='chatbot'),
     path('monitoring/', include('monitoring.urls')),
     path('login/', monitoring_views.login_view, name='login'),
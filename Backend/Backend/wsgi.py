@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
 
 application = get_wsgi_application()
+
+from common.registry import preload_models, start_reload_watcher, start_warmup
+preload_models()
+start_warmup()
+start_reload_watcher()
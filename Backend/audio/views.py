@@ -10,8 +10,11 @@ import tempfile
 import soundfile as sf
 from pydub import AudioSegment
 from pydub.exceptions import CouldntDecodeError
-from transformers import HubertForSequenceClassification, Wav2Vec2FeatureExtractor
+from transformers import AutoConfig, HubertForSequenceClassification, Wav2Vec2FeatureExtractor
 import librosa
+from common.quantization import INT8, model_precision, quantize_torch_dynamic
+from common.registry import registry
+from common.weights import load_state_dict_file, load_weights, weight_files
 
 SAMPLE_RATE = 16000
 N_MELS = 128
@@ -34,19 +37,50 @@ class AudioRNN(torch.nn.Module):
         return x
 
 MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'audio_rnn_model1.pth')
-model = AudioRNN()
-model.load_state_dict(torch.load(MODEL_PATH, map_location=torch.device('cpu')))
-model.eval()
-
-# Load sentiment analysis model and feature extractor
-sentiment_model = HubertForSequenceClassification.from_pretrained(
-    "superb/hubert-large-superb-er",
-    num_labels=4
-)
-sentiment_model.load_state_dict(torch.load(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'audio_hubert_sentiment_analysis.pth')))
-sentiment_model.eval()
+SENTIMENT_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'audio_hubert_sentiment_analysis.pth')
+
+def load_audio_rnn():
+    model = AudioRNN()
+    load_weights(model, load_state_dict_file(MODEL_PATH))
+    model.eval()
+    if model_precision('audio_rnn') == INT8:
+        model = quantize_torch_dynamic(model)
+    return model
 
-feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained("superb/hubert-large-superb-er")
+def load_sentiment_model():
+    """Load the HuBERT emotion model and its feature extractor."""
+    # Built from the config alone: the fine-tuned checkpoint replaces every pretrained weight anyway
+    config = AutoConfig.from_pretrained("superb/hubert-large-superb-er", num_labels=4)
+    sentiment_model = HubertForSequenceClassification(config)
+    load_weights(sentiment_model, load_state_dict_file(SENTIMENT_MODEL_PATH))
+    sentiment_model.eval()
+    if model_precision('hubert') == INT8:
+        sentiment_model = quantize_torch_dynamic(sentiment_model)
+    feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained("superb/hubert-large-superb-er")
+    return sentiment_model, feature_extractor
+
+def warmup_audio_rnn(model):
+    with torch.no_grad():
+        model(torch.zeros(1, 1, N_MELS, FIXED_TIME))
+
+def warmup_sentiment_model(loaded):
+    sentiment_model, feature_extractor = loaded
+    inputs = feature_extractor(np.zeros(SAMPLE_RATE, dtype=np.float32), sampling_rate=SAMPLE_RATE, return_tensors="pt")
+    with torch.no_grad():
+        sentiment_model(**inputs)
+
+# Loaded on first use; reloaded when the weights change
+registry.register(
+    'audio_rnn', load_audio_rnn, modality='audio',
+    files=weight_files(MODEL_PATH), warmup=warmup_audio_rnn,
+    # Quantizing runs torch kernels in the loader
+    fork_safe=model_precision('audio_rnn') != INT8
+)
+registry.register(
+    'hubert', load_sentiment_model, modality='audio',
+    files=weight_files(SENTIMENT_MODEL_PATH), warmup=warmup_sentiment_model,
+    fork_safe=model_precision('hubert') != INT8
+)
 
 id2label = {
     0: "angry",
@@ -55,7 +89,31 @@ id2label = {
     3: "neutral"
 }
 
+def predict_real_fake(audio_path):
+    """Score a WAV file with the AudioRNN real/fake classifier."""
+    waveform, sample_rate = torchaudio.load(audio_path, format='wav')
+    waveform = torchaudio.functional.resample(waveform, orig_freq=sample_rate, new_freq=SAMPLE_RATE)
+    if waveform.shape[0] > 1:
+        waveform = torch.mean(waveform, dim=0, keepdim=True)
+    mel_spec = mel_transform(waveform).squeeze(0)
+    mel_spec = torchaudio.transforms.AmplitudeToDB()(mel_spec)
+    if mel_spec.shape[1] < FIXED_TIME:
+        pad = FIXED_TIME - mel_spec.shape[1]
+        mel_spec = torch.nn.functional.pad(mel_spec, (0, pad))
+    else:
+        mel_spec = mel_spec[:, :FIXED_TIME]
+    mel_spec = mel_spec.unsqueeze(0).unsqueeze(0)
+    with torch.no_grad():
+        output = registry.get('audio_rnn')(mel_spec)
+        softmax = torch.nn.Softmax(dim=1)
+        probs = softmax(output)
+    return {
+        'real_prob': probs[0][0].item(),
+        'fake_prob': probs[0][1].item()
+    }
+
 def predict_emotion(audio_path):
+    sentiment_model, feature_extractor = registry.get('hubert')
     speech, sr = librosa.load(audio_path, sr=16000, mono=True)
     inputs = feature_extractor(
         speech,
@@ -92,31 +150,14 @@ def infer_audio(request):
                 audio.export(temp_audio_path_wav, format='wav')
                 os.remove(temp_audio_path)
                 temp_audio_path = temp_audio_path_wav
-            waveform, sample_rate = torchaudio.load(temp_audio_path, format='wav')
-            waveform = torchaudio.functional.resample(waveform, orig_freq=sample_rate, new_freq=SAMPLE_RATE)
-            if waveform.shape[0] > 1:
-                waveform = torch.mean(waveform, dim=0, keepdim=True)
-            mel_spec = mel_transform(waveform).squeeze(0)
-            mel_spec = torchaudio.transforms.AmplitudeToDB()(mel_spec)
-            if mel_spec.shape[1] < FIXED_TIME:
-                pad = FIXED_TIME - mel_spec.shape[1]
-                mel_spec = torch.nn.functional.pad(mel_spec, (0, pad))
-            else:
-                mel_spec = mel_spec[:, :FIXED_TIME]
-            mel_spec = mel_spec.unsqueeze(0).unsqueeze(0)
-            with torch.no_grad():
-                output = model(mel_spec)
-                softmax = torch.nn.Softmax(dim=1)
-                probs = softmax(output)
-                real_prob = probs[0][0].item()
-                fake_prob = probs[0][1].item()
+            real_fake = predict_real_fake(temp_audio_path)
 
             # Sentiment analysis
             sentiment_result = predict_emotion(temp_audio_path)
 
             return JsonResponse({
-                'real_prob': real_prob,
-                'fake_prob': fake_prob,
+                'real_prob': real_fake['real_prob'],
+                'fake_prob': real_fake['fake_prob'],
                 'sentiment': sentiment_result
             })
         except CouldntDecodeError:
@@ -0,0 +1,25 @@
+import time
+
+import numpy as np
+
+
+def time_calls(fn, runs=20, warmup=3):
+    """
+    Time repeated calls of ``fn`` after a few untimed warmup calls.
+
+    Returns:
+        dict: p50/p95/mean latency in milliseconds and the number of timed runs
+    """
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'runs': runs,
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        'mean_ms': round(float(np.mean(timings)), 3),
+    }
@@ -0,0 +1,63 @@
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Fail fast on a remote dependency after repeated errors.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    ``allow()`` refuses calls for ``cooldown`` seconds. Then a single probe
+    call is let through (half-open): its success closes the breaker, its
+    failure opens it for another cooldown.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.opens = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may be made now; a True in the open state starts the probe."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opens += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'opens': self.opens,
+                'rejected': self.rejected,
+                'failure_threshold': self.failure_threshold,
+                'cooldown': self.cooldown,
+            }
@@ -0,0 +1,34 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from common.weights import convert_to_safetensors
+
+CHECKPOINTS = {
+    'roberta': 'modele_robertaya.pth',
+    'audio_rnn': 'audio_rnn_model1.pth',
+    'hubert': 'audio_hubert_sentiment_analysis.pth',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Write .safetensors copies of the PyTorch checkpoints. Loaders memory-map them instead of '
+        'unpickling the .pth files, so worker processes can share the weight pages.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help=f"Any of {', '.join(sorted(CHECKPOINTS))} (default: all)")
+
+    def handle(self, *args, **options):
+        models = options['models'] or sorted(CHECKPOINTS)
+        unknown = sorted(set(models) - set(CHECKPOINTS))
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(unknown)}")
+        for name in models:
+            path = os.path.join(settings.BASE_DIR, 'models', CHECKPOINTS[name])
+            if not os.path.exists(path):
+                raise CommandError(f'{name}: {path} not found')
+            target_path = convert_to_safetensors(path)
+            self.stdout.write(f'{name}: {target_path} ({os.path.getsize(target_path) / 2 ** 20:.1f} MB)')
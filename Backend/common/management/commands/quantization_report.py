@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.quantization_report import MODELS, compare
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the fp32 and int8 variants of each model on a held-out sample set: '
+        'accuracy, agreement, p50/p95 latency and resident memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('samples_dir', help='Directory laid out as <model>/<label>/<sample files>')
+        parser.add_argument('models', nargs='*', help=f"Any of {', '.join(sorted(MODELS))} (default: all)")
+        parser.add_argument('--json', dest='json_path', help='Also write the full report to this file')
+
+    def handle(self, *args, **options):
+        models = options['models'] or sorted(MODELS)
+        unknown = sorted(set(models) - set(MODELS))
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(unknown)}")
+        reports = []
+        for name in models:
+            report = compare(name, options['samples_dir'])
+            reports.append(report)
+
+            self.stdout.write(f'{name}:')
+            for precision, result in report['variants'].items():
+                if not result['samples']:
+                    self.stdout.write(f'  {precision:<5} no samples')
+                    continue
+                self.stdout.write(
+                    f'  {precision:<5} accuracy {result["accuracy"]:.3f}   '
+                    f'p50 {result["p50_ms"]:8.2f} ms   p95 {result["p95_ms"]:8.2f} ms   '
+                    f'RSS {result["rss_mb"]:8.1f} MB   ({result["samples"]} samples)'
+                )
+            delta = report.get('delta')
+            if delta:
+                self.stdout.write(
+                    f'  int8 vs fp32: accuracy {delta["accuracy"]:+.3f}, agreement {delta["agreement"]:.3f}, '
+                    f'mean |score delta| {delta["mean_abs_score"]:.4f}, '
+                    f'p50 speedup {delta["p50_speedup"]:.2f}x, RSS {delta["rss_mb"]:+.1f} MB'
+                )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(reports, f, indent=2)
@@ -0,0 +1,38 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from common.quantization import quantize_onnx_dynamic
+from video.onnx_export import BRAINROT_ONNX_PATH, DEEPFAKE_ONNX_PATH
+
+# PyTorch models are quantized at load time and need no files
+ONNX_SOURCES = {
+    'nudity': os.path.join(settings.BASE_DIR, 'models', 'nudity.onnx'),
+    'brainrot': BRAINROT_ONNX_PATH,
+    'deepfake': DEEPFAKE_ONNX_PATH,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Write dynamically quantized int8 copies (<name>.int8.onnx) of the ONNX models. '
+        'Export brainrot and deepfake with export_onnx first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help=f"Any of {', '.join(sorted(ONNX_SOURCES))} (default: all)")
+
+    def handle(self, *args, **options):
+        models = options['models'] or sorted(ONNX_SOURCES)
+        unknown = sorted(set(models) - set(ONNX_SOURCES))
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(unknown)}")
+        for name in models:
+            source_path = ONNX_SOURCES[name]
+            if not os.path.exists(source_path):
+                raise CommandError(f'{name}: {source_path} not found (run export_onnx for the Keras models)')
+            target_path = quantize_onnx_dynamic(source_path)
+            source_mb = os.path.getsize(source_path) / 2 ** 20
+            target_mb = os.path.getsize(target_path) / 2 ** 20
+            self.stdout.write(f'{name}: {target_path} ({source_mb:.1f} MB -> {target_mb:.1f} MB)')
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import onnxruntime
+from django.conf import settings
+
+
+def session_options(intra_op_threads=None, inter_op_threads=None):
+    """
+    ONNX Runtime session options with explicit thread pools.
+
+    Args:
+        intra_op_threads: Threads used inside one operator (0 lets ORT decide)
+        inter_op_threads: Threads used to run independent operators in parallel
+
+    Returns:
+        onnxruntime.SessionOptions
+    """
+    if intra_op_threads is None:
+        intra_op_threads = settings.ONNX_INTRA_OP_THREADS
+    if inter_op_threads is None:
+        inter_op_threads = settings.ONNX_INTER_OP_THREADS
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    options.execution_mode = (
+        onnxruntime.ExecutionMode.ORT_PARALLEL if inter_op_threads > 1
+        else onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    )
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return options
+
+
+def create_session(path, intra_op_threads=None, inter_op_threads=None):
+    """Open an ONNX model on the CPU with the configured thread pools."""
+    return onnxruntime.InferenceSession(
+        path,
+        sess_options=session_options(intra_op_threads, inter_op_threads),
+        providers=['CPUExecutionProvider']
+    )
+
+
+class OnnxModel:
+    """
+    Single-input ONNX model exposing the Keras ``predict`` call, so it can stand in for one.
+    """
+
+    def __init__(self, path, intra_op_threads=None, inter_op_threads=None):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'ONNX model not found: {path}')
+        self.path = path
+        self.session = create_session(path, intra_op_threads, inter_op_threads)
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch, verbose=0):
+        """Run a batch through the graph and return its first output."""
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
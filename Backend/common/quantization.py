@@ -0,0 +1,67 @@
+"""
+INT8 variants of the served models.
+
+PyTorch models (RoBERTa, AudioRNN, HuBERT, CLIP) are dynamically quantized
+when they are loaded: Linear and LSTM weights are stored as int8 and
+activations are quantized on the fly, so no extra weight files are needed.
+
+ONNX models (nudity, and the exported brainrot and deepfake graphs) are
+quantized ahead of time by ``manage.py quantize_models`` into a sibling
+``<name>.int8.onnx`` file.
+
+Which variant a process serves is chosen per model through the
+``MODEL_PRECISION`` setting.
+"""
+import os
+
+from django.conf import settings
+
+FP32 = 'fp32'
+INT8 = 'int8'
+PRECISIONS = (FP32, INT8)
+
+
+def model_precision(name):
+    """
+    Configured precision for a model name (``fp32`` unless listed in ``MODEL_PRECISION``).
+
+    Raises:
+        ValueError: If the configured precision is not one of ``PRECISIONS``
+    """
+    precision = settings.MODEL_PRECISION.get(name, FP32)
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}' for model '{name}', expected one of {PRECISIONS}")
+    return precision
+
+
+def int8_path(path):
+    """Path of the quantized variant of an ONNX file: ``model.onnx`` -> ``model.int8.onnx``."""
+    root, ext = os.path.splitext(path)
+    return f'{root}.{INT8}{ext}'
+
+
+def quantize_torch_dynamic(model):
+    """
+    Dynamically quantize the Linear and LSTM layers of a PyTorch model to int8.
+
+    The model is quantized in place where possible and the quantized model is returned.
+    """
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8, inplace=True
+    )
+
+
+def quantize_onnx_dynamic(source_path, target_path=None):
+    """
+    Write an int8 copy of an ONNX model with dynamically quantized weights.
+
+    Returns:
+        str: Path of the quantized model
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    target_path = target_path or int8_path(source_path)
+    quantize_dynamic(source_path, target_path, weight_type=QuantType.QInt8)
+    return target_path
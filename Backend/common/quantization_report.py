@@ -0,0 +1,219 @@
+"""
+Accuracy, latency and memory of the fp32 and int8 variants of each model.
+
+Held-out samples are read from ``<samples_dir>/<model>/<label>/``:
+
+* ``roberta``: text files, one message per non-empty line
+* ``audio_rnn``, ``hubert``: WAV files
+* ``clip``, ``brainrot``, ``deepfake``, ``nudity``: image files
+
+Label directory names are the expected predictions (case-insensitive):
+``offensive``/``hate``/``safe``, ``real``/``fake``, the emotion names,
+``violent``/``non_violent``, ``brainrot``/``normal``, ``deepfake``/``real``
+and ``nudity``/``safe``.
+
+Every variant is evaluated in a fresh spawned process that loads the app's
+views with ``MODEL_PRECISION`` set for that model, so the measured model is
+exactly what a worker would serve and the RSS figures are not polluted by
+the other variant. The child unpickles this module before anything else, so
+it must not import Django settings or ``common.*`` modules at import time.
+"""
+import importlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def _predict_roberta(views, text):
+    import torch
+
+    from common.registry import registry
+
+    model, tokenizer = registry.get('roberta')
+    tokens = tokenizer(text, padding='max_length', truncation=True, max_length=128, return_tensors='pt')
+    with torch.no_grad():
+        probs = torch.nn.functional.softmax(model(tokens['input_ids'], tokens['attention_mask']), dim=-1)[0]
+    predicted_class = int(torch.argmax(probs))
+    return ['offensive', 'hate', 'safe'][predicted_class], float(probs[predicted_class])
+
+
+def _predict_audio_rnn(views, path):
+    fake_prob = views.predict_real_fake(path)['fake_prob']
+    return ('fake' if fake_prob > 0.5 else 'real'), fake_prob
+
+
+def _predict_hubert(views, path):
+    result = views.predict_emotion(path)
+    return result['emotion'], result['confidence'] / 100
+
+
+def _predict_clip(views, image):
+    from common.registry import registry
+
+    result = registry.get('clip').analyze_frame(np.array(image))
+    return ('violent' if result['is_violent'] else 'non_violent'), result['violence_confidence']
+
+
+def _predict_brainrot(views, image):
+    result = views._predict_brainrot_uncached(image)
+    return result['label'].lower(), result['confidence']
+
+
+def _predict_deepfake(views, image):
+    from common.registry import registry
+
+    batch = views.preprocess_image_deepfake(image)
+    raw_prediction = float(registry.get('deepfake').predict(batch, verbose=0)[0][0])
+    return ('deepfake' if raw_prediction > views.CONFIDENCE_THRESHOLD else 'real'), raw_prediction
+
+
+def _predict_nudity(views, image):
+    result = views.predict_nudity(image)
+    return result['label'].lower(), result['confidence']
+
+
+# model name -> (views module, sample kind, predictor)
+MODELS = {
+    'roberta': ('text.views', 'text', _predict_roberta),
+    'audio_rnn': ('audio.views', 'path', _predict_audio_rnn),
+    'hubert': ('audio.views', 'path', _predict_hubert),
+    'clip': ('video.views', 'image', _predict_clip),
+    'brainrot': ('video.views', 'image', _predict_brainrot),
+    'deepfake': ('video.views', 'image', _predict_deepfake),
+    'nudity': ('image.views', 'image', _predict_nudity),
+}
+
+
+def load_samples(samples_dir, name):
+    """
+    Read the labelled held-out samples of one model.
+
+    Returns:
+        list of (expected label, sample) with the sample as text, file path or RGB PIL image
+    """
+    from PIL import Image
+
+    kind = MODELS[name][1]
+    root = os.path.join(samples_dir, name)
+    samples = []
+    for label in sorted(os.listdir(root)):
+        label_dir = os.path.join(root, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for filename in sorted(os.listdir(label_dir)):
+            path = os.path.join(label_dir, filename)
+            if kind == 'text':
+                with open(path, encoding='utf-8') as f:
+                    samples.extend((label.lower(), line.strip()) for line in f if line.strip())
+            elif kind == 'image':
+                samples.append((label.lower(), Image.open(path).convert('RGB')))
+            else:
+                samples.append((label.lower(), path))
+    return samples
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # Peak rather than current RSS where /proc is unavailable (kilobytes on Linux, bytes on macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def set_precision(name, precision):
+    """
+    Pool initializer: select the variant through the environment before the settings are loaded.
+
+    Raises:
+        RuntimeError: If the settings were already loaded in this process
+    """
+    from django.conf import settings
+
+    if settings.configured:
+        raise RuntimeError('Settings were loaded before MODEL_PRECISION could be set')
+    os.environ['MODEL_PRECISION'] = f'{name}={precision}'
+
+
+def evaluate(name, precision, samples_dir):
+    """
+    Load one model variant in this process and run it over the held-out samples.
+
+    Meant to run in a fresh process whose initializer was ``set_precision``,
+    so Django is configured with ``MODEL_PRECISION`` set for ``name``.
+    """
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from common.registry import registry
+
+    if settings.MODEL_PRECISION.get(name) != precision:
+        raise RuntimeError(f"Expected {name}={precision}, settings have {settings.MODEL_PRECISION}")
+
+    module_name, _, predict = MODELS[name]
+    views = importlib.import_module(module_name)
+    # Views register their models lazily; load this one before measuring memory
+    registry.get(name)
+    rss_mb = current_rss_mb()
+
+    samples = load_samples(samples_dir, name)
+    if samples:
+        # Untimed first call, so lazy allocations do not land in the percentiles
+        predict(views, samples[0][1])
+
+    labels, predictions, scores, timings = [], [], [], []
+    for label, sample in samples:
+        start = time.perf_counter()
+        predicted, score = predict(views, sample)
+        timings.append((time.perf_counter() - start) * 1000)
+        labels.append(label)
+        predictions.append(predicted)
+        scores.append(float(score))
+
+    return {
+        'precision': precision,
+        'samples': len(samples),
+        'accuracy': float(np.mean([p == l for p, l in zip(predictions, labels)])) if samples else None,
+        'p50_ms': float(np.percentile(timings, 50)) if timings else None,
+        'p95_ms': float(np.percentile(timings, 95)) if timings else None,
+        'rss_mb': rss_mb,
+        'peak_rss_mb': current_rss_mb(),
+        'predictions': predictions,
+        'scores': scores,
+    }
+
+
+def compare(name, samples_dir, precisions=('fp32', 'int8')):
+    """
+    Evaluate each precision of a model in its own spawned process.
+
+    Returns:
+        dict: per-precision results, plus int8-vs-fp32 deltas when both ran
+    """
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for precision in precisions:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                 initializer=set_precision, initargs=(name, precision)) as executor:
+            results[precision] = executor.submit(evaluate, name, precision, samples_dir).result()
+
+    report = {'model': name, 'variants': results}
+    if 'fp32' in results and 'int8' in results and results['fp32']['samples']:
+        fp32, int8 = results['fp32'], results['int8']
+        report['delta'] = {
+            'accuracy': int8['accuracy'] - fp32['accuracy'],
+            'agreement': float(np.mean([a == b for a, b in zip(fp32['predictions'], int8['predictions'])])),
+            'mean_abs_score': float(np.mean(np.abs(np.subtract(fp32['scores'], int8['scores'])))),
+            'p50_speedup': fp32['p50_ms'] / int8['p50_ms'] if int8['p50_ms'] else None,
+            'rss_mb': int8['rss_mb'] - fp32['rss_mb'],
+        }
+    return report
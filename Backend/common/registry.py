@@ -0,0 +1,407 @@
+"""
+Process-wide registry of the served models.
+
+Apps register a loader per model at import time; nothing is loaded until the
+model is first requested with ``registry.get(name)``, or warmed ahead of
+traffic with ``start_warmup()``. Models belong to a modality (video, audio,
+text, image) and a process only serves the modalities listed in
+``ENABLED_MODALITIES``.
+
+Each loaded model carries a version derived from its weight files. When
+those files change on disk the model can be reloaded in place
+(``registry.reload(name)``, or automatically by ``start_reload_watcher()``)
+while requests keep being served by the previous copy.
+
+Under a pre-forking server that imports the application once in the parent
+(``gunicorn --preload``, uWSGI without ``lazy-apps``), ``preload_models()``
+loads the ``PRELOAD_MODELS`` there, so every worker shares the weight pages
+copy-on-write instead of loading its own copy after the fork. Such a parent
+starts no background threads of its own: warmup and reload watching start in
+each worker after the fork, since a thread holding a lock at fork time would
+leave that lock held forever in the child.
+"""
+import gc
+import logging
+import os
+import threading
+import time
+from importlib import import_module
+
+from django.conf import settings
+
+from .result_cache import file_version
+
+logger = logging.getLogger(__name__)
+
+MODALITIES = ('video', 'audio', 'text', 'image')
+
+
+class ModelUnavailable(RuntimeError):
+    """The model is not registered or its modality is disabled in this process."""
+
+
+def modality_enabled(modality):
+    return modality in settings.ENABLED_MODALITIES
+
+
+def current_rss_bytes():
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+class ModelSpec:
+    """
+    How to load one model.
+
+    Args:
+        loader: Zero-argument callable returning the model, or None when it could not be loaded
+        modality: One of ``MODALITIES``
+        files: Weight files the loader reads; their modification times form the version
+        warmup: Optional callable run once on the freshly loaded model with a dummy input
+        fork_safe: Whether the model may be loaded in a parent process that later forks.
+            False for TensorFlow and ONNX Runtime, and for loaders that run inference or
+            other parallel kernels, since the thread pools they start do not survive a fork
+    """
+
+    def __init__(self, loader, modality, files=(), warmup=None, fork_safe=True):
+        self.loader = loader
+        self.modality = modality
+        self.files = tuple(files)
+        self.warmup = warmup
+        self.fork_safe = fork_safe
+
+    def version(self):
+        existing = [path for path in self.files if os.path.exists(path)]
+        return '+'.join(file_version(path) for path in existing) or 'builtin'
+
+
+class LoadedModel:
+    """A loaded model with the version and cost of its load."""
+
+    def __init__(self, model, version, load_seconds, warmup_seconds, rss_delta_bytes, weights_bytes, warmed=True):
+        self.model = model
+        self.version = version
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+        self.warmup_seconds = warmup_seconds
+        self.rss_delta_bytes = rss_delta_bytes
+        self.weights_bytes = weights_bytes
+        self.warmed = warmed
+        self.preloaded = False
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'available': self.model is not None,
+            'loaded_at': self.loaded_at,
+            'load_seconds': round(self.load_seconds, 3),
+            'warmup_seconds': round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            # Approximate: other threads allocating during the load are counted too
+            'rss_delta_mb': round(self.rss_delta_bytes / 2 ** 20, 1) if self.rss_delta_bytes is not None else None,
+            'weights_mb': round(self.weights_bytes / 2 ** 20, 1),
+            'preloaded': self.preloaded,
+        }
+
+
+class ModelRegistry:
+    """
+    Lazily loaded, reloadable models keyed by name.
+
+    Each model is loaded at most once, under its own lock, so concurrent first
+    requests wait for one load instead of racing, and loading one model never
+    blocks requests for another. A loader may return ``None`` to signal that
+    the model could not be loaded; that outcome is remembered like any other
+    until the next reload.
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._loaded = {}
+        self._load_locks = {}
+        self._reloads = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, modality, files=(), warmup=None, fork_safe=True):
+        """Register (or replace) the loader of a model; see ``ModelSpec`` for the arguments."""
+        with self._lock:
+            self._specs[name] = ModelSpec(loader, modality, files, warmup, fork_safe)
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def names(self, modality=None):
+        with self._lock:
+            return [name for name, spec in self._specs.items() if modality is None or spec.modality == modality]
+
+    def is_loaded(self, name):
+        return name in self._loaded
+
+    def get(self, name):
+        """
+        Return the model, loading it on first use.
+
+        Raises:
+            ModelUnavailable: If the model is unknown or its modality is disabled
+        """
+        try:
+            return self._loaded[name].model
+        except KeyError:
+            pass
+        spec, load_lock = self._spec(name)
+        with load_lock:
+            if name not in self._loaded:
+                self._loaded[name] = self._load(name, spec)
+        return self._loaded[name].model
+
+    def version(self, name):
+        """Version of the loaded model (loading it if needed)."""
+        self.get(name)
+        return self._loaded[name].version
+
+    def reload(self, name, force=True):
+        """
+        Load a fresh copy of a model and swap it in once it is ready.
+
+        Requests keep using the current copy while the new one loads. If the
+        new load fails the current copy stays in place.
+
+        Args:
+            force: Reload even if the weight files still have the loaded version
+
+        Returns:
+            bool: True if a new copy was swapped in
+        """
+        spec, load_lock = self._spec(name)
+        with load_lock:
+            current = self._loaded.get(name)
+            if not force and current is not None and current.version == spec.version():
+                return False
+            try:
+                fresh = self._load(name, spec)
+            except Exception as e:
+                logger.error(f"Error reloading model '{name}': {str(e)}")
+                self._errors[name] = str(e)
+                return False
+            if fresh.model is None and current is not None and current.model is not None:
+                logger.error(f"Reloading model '{name}' failed, keeping version {current.version}")
+                self._errors[name] = 'Loader returned no model'
+                return False
+            self._loaded[name] = fresh
+            self._reloads[name] = self._reloads.get(name, 0) + 1
+            self._errors.pop(name, None)
+        logger.info(f"Reloaded model '{name}' at version {fresh.version}")
+        return True
+
+    def reload_changed(self):
+        """Reload every loaded model whose weight files changed on disk; returns the reloaded names."""
+        reloaded = []
+        for name in list(self._loaded):
+            spec = self._specs[name]
+            if spec.files and self._loaded[name].version != spec.version() and self.reload(name, force=False):
+                reloaded.append(name)
+        return reloaded
+
+    def warm(self, names=None):
+        """Load the given models (default: every enabled one) now, logging rather than raising failures."""
+        for name in names if names is not None else self.names():
+            with self._lock:
+                spec = self._specs.get(name)
+            if spec is None or not modality_enabled(spec.modality):
+                continue
+            try:
+                self.get(name)
+                self._ensure_warmed(name, spec)
+            except Exception as e:
+                logger.error(f"Error warming model '{name}': {str(e)}")
+
+    def preload(self, names=None):
+        """
+        Load fork-safe models without their warmup inference, ahead of a fork.
+
+        The warmup is left to each worker (see ``warm``) because inference in
+        the parent would start thread pools that a forked child cannot use.
+
+        Returns:
+            list: Names of the models loaded
+        """
+        preloaded = []
+        for name in names if names is not None else self.names():
+            with self._lock:
+                spec = self._specs.get(name)
+            if spec is None or not modality_enabled(spec.modality):
+                continue
+            if not spec.fork_safe:
+                logger.warning(f"Not preloading model '{name}': it is not fork-safe")
+                continue
+            _, load_lock = self._spec(name)
+            try:
+                with load_lock:
+                    if name not in self._loaded:
+                        self._loaded[name] = self._load(name, spec, run_warmup=False)
+                        self._loaded[name].preloaded = True
+                preloaded.append(name)
+            except Exception as e:
+                logger.error(f"Error preloading model '{name}': {str(e)}")
+        return preloaded
+
+    def stats(self):
+        """Per-model load state, version, load and warmup time, and memory."""
+        report = {}
+        with self._lock:
+            specs = dict(self._specs)
+        for name, spec in specs.items():
+            entry = self._loaded.get(name)
+            report[name] = dict(
+                entry.stats() if entry is not None else {'version': None, 'available': None},
+                modality=spec.modality,
+                enabled=modality_enabled(spec.modality),
+                loaded=entry is not None,
+                reloads=self._reloads.get(name, 0),
+                last_error=self._errors.get(name),
+            )
+        return report
+
+    def _spec(self, name):
+        with self._lock:
+            spec = self._specs.get(name)
+            load_lock = self._load_locks.get(name)
+        if spec is None:
+            raise ModelUnavailable(f"Model '{name}' is not registered")
+        if not modality_enabled(spec.modality):
+            raise ModelUnavailable(f"Model '{name}' is disabled ({spec.modality} is not in ENABLED_MODALITIES)")
+        return spec, load_lock
+
+    def _ensure_warmed(self, name, spec):
+        entry = self._loaded.get(name)
+        if entry is None or entry.warmed:
+            return
+        _, load_lock = self._spec(name)
+        with load_lock:
+            if not entry.warmed:
+                entry.warmup_seconds = self._run_warmup(name, spec, entry.model)
+                entry.warmed = True
+
+    def _run_warmup(self, name, spec, model):
+        if model is None or spec.warmup is None:
+            return None
+        start = time.perf_counter()
+        try:
+            spec.warmup(model)
+            return time.perf_counter() - start
+        except Exception as e:
+            logger.error(f"Warmup inference failed for model '{name}': {str(e)}")
+            return None
+
+    def _load(self, name, spec, run_warmup=True):
+        version = spec.version()
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        model = spec.loader()
+        load_seconds = time.perf_counter() - start
+
+        warmup_seconds = self._run_warmup(name, spec, model) if run_warmup else None
+
+        rss_after = current_rss_bytes()
+        rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        weights_bytes = sum(os.path.getsize(path) for path in spec.files if os.path.exists(path))
+        logger.info(f"Loaded model '{name}' ({version}) in {load_seconds:.1f}s")
+        return LoadedModel(model, version, load_seconds, warmup_seconds, rss_delta, weights_bytes, warmed=run_warmup)
+
+
+registry = ModelRegistry()
+
+# Set by preload_models(): this process is the parent of pre-forked workers
+_forking_parent = False
+
+
+def _model_names(setting):
+    return None if setting == ['all'] else setting
+
+
+def _in_every_process(start):
+    """
+    Run ``start`` in every worker process.
+
+    In a preload parent, whose only job is to fork workers, it runs in each
+    forked child instead of here, since threads do not survive a fork. A worker
+    runs it once; processes it forks later do not restart it.
+    """
+    if _forking_parent:
+        os.register_at_fork(after_in_child=start)
+    else:
+        start()
+
+
+def preload_models():
+    """
+    Load ``PRELOAD_MODELS`` synchronously in this (parent) process.
+
+    Afterwards the surviving objects are moved to the permanent GC generation
+    so collections in the forked workers do not touch, and thereby copy, the
+    pages holding them. Preloaded models are warmed in each worker after the fork.
+
+    Setting ``PRELOAD_MODELS`` declares that this process forks the workers, so
+    ``start_warmup`` and ``start_reload_watcher`` start their threads only in
+    the children. Call this before them.
+    """
+    global _forking_parent
+    if not settings.PRELOAD_MODELS:
+        return []
+    _forking_parent = True
+    import_module(settings.ROOT_URLCONF)
+    preloaded = registry.preload(_model_names(settings.PRELOAD_MODELS))
+    gc.collect()
+    gc.freeze()
+
+    def _warm_in_worker():
+        threading.Thread(target=registry.warm, args=(preloaded,), name='model-warmup', daemon=True).start()
+
+    os.register_at_fork(after_in_child=_warm_in_worker)
+    return preloaded
+
+
+def start_warmup():
+    """
+    Load the models listed in ``WARMUP_MODELS`` on a background thread.
+
+    The URL configuration is imported first so every enabled app has
+    registered its models. Called from the WSGI/ASGI entry points, so
+    management commands never pay for it.
+    """
+    if not settings.WARMUP_MODELS:
+        return
+
+    def _warm():
+        import_module(settings.ROOT_URLCONF)
+        registry.warm(_model_names(settings.WARMUP_MODELS))
+
+    def _start():
+        threading.Thread(target=_warm, name='model-warmup', daemon=True).start()
+
+    _in_every_process(_start)
+
+
+def start_reload_watcher():
+    """
+    Poll the weight files of loaded models every ``MODEL_RELOAD_INTERVAL`` seconds and hot-reload changed ones.
+
+    Disabled when the interval is 0.
+    """
+    if not settings.MODEL_RELOAD_INTERVAL:
+        return
+
+    def _watch():
+        while True:
+            time.sleep(settings.MODEL_RELOAD_INTERVAL)
+            try:
+                registry.reload_changed()
+            except Exception as e:
+                logger.error(f"Error checking models for reload: {str(e)}")
+
+    def _start():
+        threading.Thread(target=_watch, name='model-reload-watcher', daemon=True).start()
+
+    _in_every_process(_start)
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+
+def pixel_digest(pixels):
+    """
+    Content digest of decoded pixels, independent of how the image was encoded or sent.
+
+    Args:
+        pixels: PIL image or NumPy array
+
+    Returns:
+        str: Hex digest covering the shape and every pixel value
+    """
+    array = np.ascontiguousarray(np.asarray(pixels))
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(array.shape).encode())
+    digest.update(array.data)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of model results keyed by content digest and model version.
+
+    Entries optionally expire ``ttl`` seconds after being stored. Results are
+    copied in and out so callers can annotate what they get back.
+    """
+
+    def __init__(self, max_entries=4096, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, result):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, model, version, digest, compute):
+        """
+        Return the cached result for ``digest`` under ``model``/``version``, computing it on a miss.
+
+        The returned dict carries ``cached: True`` when it came from the cache.
+        """
+        key = (model, version, digest)
+        result = self.get(key)
+        if result is not None:
+            result['cached'] = True
+            return result
+        result = compute()
+        self.set(key, result)
+        return dict(result, cached=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def file_version(path):
+    """Version tag for a model file: its name plus modification time, so retrained weights miss the cache."""
+    try:
+        return f'{os.path.basename(path)}@{int(os.path.getmtime(path))}'
+    except OSError:
+        return os.path.basename(path)
+
+
+_frame_cache = None
+_frame_cache_lock = threading.Lock()
+
+
+def get_frame_cache():
+    """
+    The cache shared by every image/frame classifier in the process.
+
+    Created on first use, so importing this module does not load the settings.
+    """
+    global _frame_cache
+    if _frame_cache is None:
+        with _frame_cache_lock:
+            if _frame_cache is None:
+                _frame_cache = ResultCache(
+                    max_entries=settings.FRAME_CACHE_MAX_ENTRIES,
+                    ttl=settings.FRAME_CACHE_TTL
+                )
+    return _frame_cache
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.model_stats, name='model_stats'),
+    path('<str:name>/reload/', views.reload_model, name='reload_model'),
+]
@@ -0,0 +1,30 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .registry import ModelUnavailable, registry
+
+
+@require_http_methods(["GET"])
+def model_stats(request):
+    """
+    Report version, load state, load/warmup time and memory of every registered model.
+    """
+    return JsonResponse(registry.stats())
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def reload_model(request, name):
+    """
+    Reload a model's weights from disk without restarting the worker.
+
+    Only this process reloads; other workers pick changes up through MODEL_RELOAD_INTERVAL.
+    """
+    try:
+        reloaded = registry.reload(name)
+    except ModelUnavailable as e:
+        return Response({'error': str(e)}, status=404)
+    return Response(dict(registry.stats()[name], reloaded=reloaded), status=200 if reloaded else 500)
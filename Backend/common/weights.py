@@ -0,0 +1,79 @@
+"""
+PyTorch weight loading that lets forked workers share pages.
+
+``manage.py convert_weights`` writes a ``.safetensors`` copy next to each
+``.pth`` checkpoint. When that copy exists it is memory-mapped instead of
+unpickled, and on PyTorch versions that support ``load_state_dict(assign=True)``
+the model parameters keep pointing at the mapped file. Every worker process
+then reads the same page-cache pages instead of holding a private copy.
+"""
+import inspect
+import os
+
+import torch
+
+
+def safetensors_path(path):
+    """Sibling ``.safetensors`` path of a ``.pth`` checkpoint."""
+    return os.path.splitext(path)[0] + '.safetensors'
+
+
+def weight_files(path):
+    """The checkpoint and its safetensors copy, for registry versioning."""
+    return [path, safetensors_path(path)]
+
+
+def load_state_dict_file(path):
+    """
+    Read a state dict, preferring the memory-mapped safetensors copy of ``path``.
+
+    Returns:
+        dict: Parameter name -> CPU tensor
+    """
+    mapped_path = safetensors_path(path)
+    if os.path.exists(mapped_path):
+        from safetensors.torch import load_file
+        return load_file(mapped_path, device='cpu')
+    return torch.load(path, map_location=torch.device('cpu'))
+
+
+def _supports_assign():
+    return 'assign' in inspect.signature(torch.nn.Module.load_state_dict).parameters
+
+
+def load_weights(model, state_dict, strict=True):
+    """
+    Load a state dict into a model without copying tensors where PyTorch allows it.
+
+    With ``assign=True`` the module adopts the given tensors, so mmap-backed
+    safetensors weights stay shared between processes. Older PyTorch copies
+    them into the module's own parameters as usual.
+    """
+    if _supports_assign():
+        return model.load_state_dict(state_dict, strict=strict, assign=True)
+    return model.load_state_dict(state_dict, strict=strict)
+
+
+def convert_to_safetensors(path):
+    """
+    Write the safetensors copy of a ``.pth`` state dict.
+
+    Tensors that share storage are cloned, as safetensors requires distinct buffers.
+
+    Returns:
+        str: Path of the written file
+    """
+    from safetensors.torch import save_file
+
+    state_dict = torch.load(path, map_location=torch.device('cpu'))
+    seen = set()
+    tensors = {}
+    for name, tensor in state_dict.items():
+        if not isinstance(tensor, torch.Tensor):
+            continue
+        storage = tensor.untyped_storage().data_ptr()
+        tensors[name] = tensor.clone().contiguous() if storage in seen else tensor.contiguous()
+        seen.add(storage)
+    target_path = safetensors_path(path)
+    save_file(tensors, target_path)
+    return target_path
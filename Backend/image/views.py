@@ -1,16 +1,18 @@
 from django.shortcuts import render
-import base64
-import io
 import numpy as np
-from PIL import Image as pil_image, UnidentifiedImageError
+from PIL import Image as pil_image
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-import onnxruntime
 import os
 import json
 import requests
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from common.frames import read_image
+from common.result_cache import get_frame_cache, pixel_digest
+from common.onnx_runtime import OnnxModel
+from common.quantization import INT8, int8_path, model_precision
+from common.registry import registry
 
 # Create your views here.
 
@@ -18,36 +20,45 @@ from django.views.decorators.csrf import csrf_exempt
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODEL_PATH = os.path.join(BASE_DIR, 'models', 'nudity.onnx')
 
-# Initialize ONNX Runtime session
-session = onnxruntime.InferenceSession(MODEL_PATH)
-input_name = session.get_inputs()[0].name
+# ONNX Runtime session, opened on first use (the int8 variant is written by `manage.py quantize_models nudity`)
+SERVED_MODEL_PATH = int8_path(MODEL_PATH) if model_precision('nudity') == INT8 else MODEL_PATH
+registry.register(
+    'nudity', lambda: OnnxModel(SERVED_MODEL_PATH), modality='image',
+    files=[SERVED_MODEL_PATH],
+    warmup=lambda session: session.predict(np.zeros((1, 256, 256, 3), dtype=np.float32)),
+    # ONNX Runtime starts its thread pools when the session is created
+    fork_safe=False
+)
 
-def preprocess_image(image_data):
-    try:
-        image_data = base64.b64decode(image_data.split(',')[1])
-        image = pil_image.open(io.BytesIO(image_data)).convert("RGB")
-        interpolation = getattr(pil_image, "LANCZOS", pil_image.BICUBIC)
-        image = image.resize((256, 256), interpolation)
-        img_array = np.asarray(image, dtype="float32") / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-        return img_array
-    except (IndexError, ValueError, UnidentifiedImageError, Exception) as e:
-        print("Image decode error:", e)
-        return None
+def preprocess_image(image):
+    interpolation = getattr(pil_image, "LANCZOS", pil_image.BICUBIC)
+    image = image.resize((256, 256), interpolation)
+    img_array = np.asarray(image, dtype="float32") / 255.0
+    img_array = np.expand_dims(img_array, axis=0)
+    return img_array
 
 @api_view(['POST'])
 def classify_nudity(request):
-    image_data = request.data.get('image')
-    img = preprocess_image(image_data)
-    if img is None:
+    try:
+        image, _ = read_image(request)
+    except Exception as e:
+        print("Image decode error:", e)
         return Response({'error': 'Invalid image data'}, status=400)
-    prediction = session.run(None, {input_name: img})[0]
+    result = get_frame_cache().get_or_compute(
+        'nudity', registry.version('nudity'), pixel_digest(image),
+        lambda: predict_nudity(image)
+    )
+    return Response(result)
+
+def predict_nudity(image):
+    img = preprocess_image(image)
+    prediction = registry.get('nudity').predict(img)
     label = "Nudity" if prediction[0][0] > 0.5 else "Safe"
     confidence = float(prediction[0][0])
-    return Response({
+    return {
         'label': label,
         'confidence': confidence
-    })
+    }
 
 @csrf_exempt
 def proxy_image(request):
@@ -0,0 +1,223 @@
+"""
+Remote classification of conversation text with Gemini.
+
+Calls go through one pooled ``requests.Session`` (keep-alive connections are
+reused across requests) on a small thread pool, so ``classify_text`` can start
+the remote call first, run RoBERTa meanwhile, and wait only until a deadline.
+The API endpoint comes from ``GEMINI_API_URL`` so a local stub server can
+stand in for it.
+
+Results are cached by a hash of the classified text, and a circuit breaker
+stops calling the API for a cooldown after consecutive failures, so an
+outage costs one fast "unavailable" answer instead of a timeout per request.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from common.circuit_breaker import CircuitBreaker
+from common.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_maxsize=settings.GEMINI_MAX_WORKERS))
+session.mount('http://', HTTPAdapter(pool_maxsize=settings.GEMINI_MAX_WORKERS))
+
+executor = ThreadPoolExecutor(max_workers=settings.GEMINI_MAX_WORKERS, thread_name_prefix='gemini')
+
+result_cache = ResultCache(
+    max_entries=settings.GEMINI_CACHE_MAX_ENTRIES,
+    ttl=settings.GEMINI_CACHE_TTL
+)
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.GEMINI_BREAKER_FAILURES,
+    cooldown=settings.GEMINI_BREAKER_COOLDOWN
+)
+
+
+class CallStats:
+    """Counters and recent latencies of the calls that actually reached the network."""
+
+    def __init__(self, window=1000):
+        self.calls = 0
+        self.failures = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, failed):
+        with self._lock:
+            self.calls += 1
+            self.failures += int(failed)
+            self._latencies.append(seconds * 1000)
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                'calls': self.calls,
+                'failures': self.failures,
+                'error_rate': round(self.failures / self.calls, 4) if self.calls else 0.0,
+                'p50_ms': round(float(np.percentile(latencies, 50)), 1) if latencies else None,
+                'p95_ms': round(float(np.percentile(latencies, 95)), 1) if latencies else None,
+            }
+
+
+call_stats = CallStats()
+
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")  # Ensure this environment variable is set
+
+def classify_text_with_gemini(text_to_classify):
+    if not GEMINI_API_KEY:
+        logger.error("GEMINI_API_KEY not found in environment variables.")
+        return {"error": "Gemini API key not configured"}
+
+    if not text_to_classify or text_to_classify.strip() == "":
+        logger.warn("No text provided for Gemini classification.")
+        return {"error": "No text provided for classification"}
+
+    cache_key = ('gemini', hashlib.sha256(text_to_classify.encode('utf-8')).hexdigest())
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if not breaker.allow():
+        logger.warning("Gemini circuit open, skipping remote classification")
+        return {"status": "unavailable", "error": "Gemini temporarily disabled after repeated failures"}
+
+    start = time.perf_counter()
+    result, reached = _request_classification(text_to_classify)
+    call_stats.record(time.perf_counter() - start, failed=not reached)
+    if reached:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+
+    if "error" not in result:
+        result_cache.set(cache_key, result)
+    return result
+
+
+def _request_classification(text_to_classify):
+    """
+    Call the API once.
+
+    Returns:
+        Tuple of (result dict, whether the API answered at all); unparseable
+        answers count as answered, transport and HTTP errors do not
+    """
+    prompt = (
+        "Classify the following text based on these categories:\n"
+        "- Manipulative\n"
+        "- Potential suicide\n"
+        "- Blackmail\n"
+        "- Meeting attempt\n\n"
+        "Text to classify:\n"
+        f'"""{text_to_classify}"""\n\n'
+        "Return the classification as a JSON object where keys are the categories and values are boolean (true if the category applies, false otherwise). "
+        "For example:\n"
+        "{\n"
+        "  \"Manipulative\": false,\n"
+        "  \"Potential_suicide\": true,\n"
+        "  \"Blackmail\": false,\n"
+        "  \"Meeting_attempt\": false\n"
+        "}\n"
+        "If multiple categories apply, set all relevant ones to true. If none apply, all should be false.\n"
+        "Only return the JSON object."
+    )
+
+    payload = {
+        "contents": [{
+            "parts": [{"text": prompt}]
+        }]
+    }
+    headers = {
+        'Content-Type': 'application/json'
+    }
+    
+    full_url = f"{settings.GEMINI_API_URL}?key={GEMINI_API_KEY}"
+
+    try:
+        response = session.post(full_url, headers=headers, json=payload, timeout=settings.GEMINI_TIMEOUT)
+        response.raise_for_status()  # Raises an HTTPError for bad responses (4XX or 5XX)
+        
+        result = response.json()
+        
+        if result.get("candidates") and result["candidates"][0].get("content") and result["candidates"][0]["content"].get("parts") and result["candidates"][0]["content"]["parts"][0].get("text"):
+            classification_json_string = result["candidates"][0]["content"]["parts"][0]["text"]
+            logger.info(f"Raw classification JSON string from Gemini: {classification_json_string}")
+            try:
+                # Attempt to clean the string if it's wrapped in markdown
+                if classification_json_string.strip().startswith("```json"):
+                    classification_json_string = classification_json_string.strip()[7:-3].strip()
+                elif classification_json_string.strip().startswith("```"):
+                    classification_json_string = classification_json_string.strip()[3:-3].strip()
+
+                classification_result = json.loads(classification_json_string.strip())
+                # Standardize keys to be consistent (e.g., lowercase with underscores)
+                standardized_result = {
+                    "manipulative": classification_result.get("Manipulative", classification_result.get("manipulative", False)),
+                    "potential_suicide": classification_result.get("Potential suicide", classification_result.get("potential_suicide", classification_result.get("Potential_suicide", False))),
+                    "blackmail": classification_result.get("Blackmail", classification_result.get("blackmail", False)),
+                    "meeting_attempt": classification_result.get("Meeting attempt", classification_result.get("meeting_attempt", classification_result.get("Meeting_attempt", False))),
+                }
+                logger.info(f"Parsed and standardized Gemini classification result: {standardized_result}")
+                return standardized_result, True
+            except json.JSONDecodeError as parse_error:
+                logger.error(f"Error parsing classification JSON from Gemini: {parse_error}, Raw string: {classification_json_string}")
+                return {"error": "Failed to parse classification from Gemini", "raw_response": classification_json_string}, True
+        else:
+            logger.warn(f"No classification found in Gemini response: {result}")
+            return {"error": "No classification data in Gemini response", "raw_response": result}, True
+            
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error calling Gemini API: {e}")
+        return {"error": f"Gemini API request failed: {str(e)}"}, False
+    except Exception as e:
+        logger.error(f"Unexpected error during Gemini classification: {e}")
+        logger.error(traceback.format_exc())
+        return {"error": f"Unexpected error in Gemini classification: {str(e)}"}, False
+
+
+def submit_classification(text_to_classify):
+    """Start ``classify_text_with_gemini`` on the pool and return its future."""
+    return executor.submit(classify_text_with_gemini, text_to_classify)
+
+
+def wait_for_classification(future, deadline):
+    """
+    Wait for a submitted classification until the monotonic ``deadline``.
+
+    Returns:
+        dict: The Gemini result; ``{"status": "pending", ...}`` if it is still
+        running at the deadline; ``{"status": "unavailable", ...}`` if the call raised
+    """
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except TimeoutError:
+        logger.warning("Gemini classification still pending at the response deadline")
+        return {"status": "pending", "error": "Gemini classification did not finish in time"}
+    except Exception as e:
+        logger.error(f"Gemini classification failed: {e}")
+        return {"status": "unavailable", "error": f"Gemini classification failed: {str(e)}"}
+
+
+def stats():
+    """Remote call latency and error rate, circuit breaker state, and result cache hit rate."""
+    return {
+        'calls': call_stats.stats(),
+        'breaker': breaker.stats(),
+        'cache': result_cache.stats(),
+    }
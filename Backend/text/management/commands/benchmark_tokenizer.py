@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from common.benchmark import time_calls
+from common.registry import registry
+from text import views
+
+SAMPLE_MESSAGES = [
+    'hey, are you coming tonight?',
+    'lol that was so funny',
+    'I can not believe you said that to her, it was really out of line and everyone saw it',
+    'send me the pics or everyone at school will see the chat',
+    'ok',
+    'Meet me after class, I need to tell you something important about what happened on Saturday',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure RoBERTa tokenization throughput in tokens per second: the Python tokenizer called '
+        'per message (before) against the fast tokenizer called on the whole batch (after), '
+        'optionally including the model forward pass.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages-file', help='Text file with one message per line (default: built-in samples)')
+        parser.add_argument('--messages', type=int, default=256, help='Messages per timed call')
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per case')
+        parser.add_argument('--with-model', action='store_true', help='Also time tokenization plus inference')
+
+    def handle(self, *args, **options):
+        if options['messages_file']:
+            with open(options['messages_file'], encoding='utf-8') as f:
+                samples = [line.strip() for line in f if line.strip()]
+        else:
+            samples = SAMPLE_MESSAGES
+        if not samples:
+            raise CommandError('No messages to tokenize')
+        messages = (samples * (options['messages'] // len(samples) + 1))[:options['messages']]
+
+        slow = views.load_tokenizer(fast=False)
+        fast = views.load_tokenizer()
+        tokens = sum(len(ids) for ids in fast(messages, truncation=True, max_length=views.MAX_LENGTH)['input_ids'])
+
+        cases = {
+            'python, per message': lambda: [slow(m, truncation=True, max_length=views.MAX_LENGTH) for m in messages],
+            'python, batched': lambda: slow(messages, truncation=True, max_length=views.MAX_LENGTH),
+            'fast, batched': lambda: fast(messages, truncation=True, max_length=views.MAX_LENGTH),
+        }
+        if options['with_model']:
+            loaded = registry.get('roberta')
+            if loaded is None:
+                raise CommandError('The RoBERTa model could not be loaded')
+            model = loaded[0]
+            cases['python + model'] = lambda: views.predict_probabilities(messages, model, slow)
+            cases['fast + model'] = lambda: views.predict_probabilities(messages, model, fast)
+
+        self.stdout.write(f'{len(messages)} messages, {tokens} tokens per call')
+        for label, fn in cases.items():
+            timing = time_calls(fn, runs=options['runs'], warmup=1)
+            self.stdout.write(
+                f"{label:22} p50 {timing['p50_ms']:9.2f} ms  "
+                f"{tokens / (timing['mean_ms'] / 1000):12,.0f} tokens/s"
+            )
@@ -1,3 +1,117 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+
+from common.circuit_breaker import CLOSED, OPEN, CircuitBreaker
+from common.result_cache import ResultCache
+from . import gemini
+
+CLASSIFICATION = {"Manipulative": True, "Potential suicide": False, "Blackmail": False, "Meeting attempt": False}
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """Answers like the Gemini API, slowly or with a 503 depending on ``mode``."""
+
+    mode = 'ok'
+    delay = 0.5
+    requests = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        type(self).requests += 1
+        if self.mode == 'error':
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.mode == 'slow':
+            time.sleep(self.delay)
+        text = f"```json\n{json.dumps(CLASSIFICATION)}\n```"
+        body = json.dumps({'candidates': [{'content': {'parts': [{'text': text}]}}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GeminiStubServerTests(SimpleTestCase):
+    """The remote classification path against a local stand-in for the Gemini API."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGeminiHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.api_url = f'http://127.0.0.1:{cls.server.server_port}/generate'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubGeminiHandler.mode = 'ok'
+        StubGeminiHandler.requests = 0
+        self.breaker = CircuitBreaker(failure_threshold=2, cooldown=0.2)
+        self.cache = ResultCache(max_entries=16, ttl=60)
+        settings_override = override_settings(GEMINI_API_URL=self.api_url, GEMINI_TIMEOUT=5)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for name, value in (('GEMINI_API_KEY', 'test-key'), ('breaker', self.breaker), ('result_cache', self.cache)):
+            patcher = mock.patch.object(gemini, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_result_is_pending_when_deadline_passes(self):
+        StubGeminiHandler.mode = 'slow'
+        future = gemini.submit_classification('a slow message')
+        result = gemini.wait_for_classification(future, time.monotonic() + 0.1)
+        self.assertEqual(result['status'], 'pending')
+        # The call still completes in the background and is cached for the next request
+        self.assertEqual(future.result(timeout=5)['manipulative'], True)
+        self.assertEqual(self.cache.stats()['entries'], 1)
+
+    def test_error_result_is_not_cached(self):
+        StubGeminiHandler.mode = 'error'
+        self.assertIn('error', gemini.classify_text_with_gemini('hello'))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+        StubGeminiHandler.mode = 'ok'
+        self.assertEqual(gemini.classify_text_with_gemini('hello')['manipulative'], True)
+        self.assertEqual(gemini.classify_text_with_gemini('hello')['manipulative'], True)
+        self.assertEqual(StubGeminiHandler.requests, 2)
+
+    def test_breaker_opens_then_probes_after_cooldown(self):
+        StubGeminiHandler.mode = 'error'
+        gemini.classify_text_with_gemini('first')
+        gemini.classify_text_with_gemini('second')
+        self.assertEqual(self.breaker.stats()['state'], OPEN)
+
+        result = gemini.classify_text_with_gemini('third')
+        self.assertEqual(result['status'], 'unavailable')
+        self.assertEqual(StubGeminiHandler.requests, 2)
+
+        time.sleep(0.25)
+        StubGeminiHandler.mode = 'ok'
+        self.assertEqual(gemini.classify_text_with_gemini('third')['manipulative'], True)
+        self.assertEqual(StubGeminiHandler.requests, 3)
+        self.assertEqual(self.breaker.stats()['state'], CLOSED)
+
+    def test_failed_probe_reopens_breaker(self):
+        StubGeminiHandler.mode = 'error'
+        gemini.classify_text_with_gemini('first')
+        gemini.classify_text_with_gemini('second')
+        time.sleep(0.25)
+        gemini.classify_text_with_gemini('probe')
+        self.assertEqual(StubGeminiHandler.requests, 3)
+        self.assertEqual(self.breaker.stats()['state'], OPEN)
+        self.assertEqual(gemini.classify_text_with_gemini('after')['status'], 'unavailable')
@@ -3,4 +3,6 @@ from . import views
 
 urlpatterns = [
     path('classify_text/', views.classify_text),
+    path('cache-stats/', views.cache_stats),
+    path('gemini-stats/', views.gemini_stats),
 ] 
\ No newline at end of file
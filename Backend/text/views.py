@@ -1,18 +1,27 @@
 from django.shortcuts import render
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
 import torch
 from torch import nn
-from transformers import RobertaTokenizer, RobertaModel, RobertaConfig
+from transformers import RobertaTokenizer, RobertaTokenizerFast, RobertaModel, RobertaConfig
 import os
 import traceback
 import logging
 import gc
+import threading
+import time
+import unicodedata
 import warnings
 from transformers import logging as transformers_logging
-import requests  # Added for Gemini API call
+from common.quantization import INT8, model_precision, quantize_torch_dynamic
+from common.registry import registry
+from common.weights import load_state_dict_file, load_weights, weight_files
+from common.result_cache import ResultCache
+from . import gemini
+from .gemini import submit_classification, wait_for_classification
 
 # Suppress unnecessary warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -21,16 +30,20 @@ transformers_logging.set_verbosity_error()
 # Set up logging
 logger = logging.getLogger(__name__)
 
+AIGIS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_LENGTH = 128
+
 class ModeleRoBERTa(nn.Module):
     def __init__(self):
         super(ModeleRoBERTa, self).__init__()
         config = RobertaConfig.from_pretrained('roberta-base')
         self.roberta = RobertaModel(config)
         self.classification_head = nn.Linear(config.hidden_size, 3)
+        # Inputs are at most MAX_LENGTH tokens, so one buffer serves every call; not saved with the weights
+        self.register_buffer('position_ids', torch.arange(MAX_LENGTH, dtype=torch.long).unsqueeze(0), persistent=False)
 
     def forward(self, input_ids, attention_mask):
-        position_ids = torch.arange(input_ids.size(1), dtype=torch.long, device=input_ids.device)
-        position_ids = position_ids.unsqueeze(0).expand_as(input_ids)
+        position_ids = self.position_ids[:, :input_ids.size(1)].expand_as(input_ids)
         outputs = self.roberta(
             input_ids=input_ids,
             attention_mask=attention_mask,
@@ -39,11 +52,27 @@ class ModeleRoBERTa(nn.Module):
         logits = self.classification_head(outputs.pooler_output)
         return logits
 
-model = None
-tokenizer = None
+def load_tokenizer(fast=True):
+    """
+    Load the roberta-base tokenizer from the local cache.
+
+    The fast tokenizer is the Rust implementation; with no ``tokenizer.json`` in
+    the cache it is converted from the same vocab and merges files.
+    """
+    tokenizer_class = RobertaTokenizerFast if fast else RobertaTokenizer
+    return tokenizer_class.from_pretrained(
+        'roberta-base',
+        local_files_only=True,
+        cache_dir=os.path.join(AIGIS_DIR, 'cache')
+    )
 
 def load_model_and_tokenizer():
-    global model, tokenizer
+    """
+    Load the fine-tuned RoBERTa classifier and its tokenizer.
+
+    Returns:
+        Tuple of (model, tokenizer), or None if loading failed
+    """
     try:
         gc.collect()
         torch.cuda.empty_cache() if torch.cuda.is_available() else None
@@ -60,136 +89,287 @@ def load_model_and_tokenizer():
             else:
                 raise FileNotFoundError(f"Model file not found at either {model_path} or {alt_model_path}")
         logger.info("Loading tokenizer...")
-        tokenizer = RobertaTokenizer.from_pretrained(
-            'roberta-base',
-            local_files_only=True,
-            cache_dir=os.path.join(aigis_dir, 'cache')
-        )
+        try:
+            tokenizer = load_tokenizer()
+        except Exception as e:
+            logger.warning(f"Fast tokenizer unavailable, using the Python tokenizer: {str(e)}")
+            tokenizer = load_tokenizer(fast=False)
         logger.info("Creating model...")
         model = ModeleRoBERTa()
         logger.info("Loading model weights...")
-        state_dict = torch.load(model_path, map_location=torch.device('cpu'))
+        state_dict = load_state_dict_file(model_path)
         model_state_dict = model.state_dict()
         for key in list(state_dict.keys()):
             if key not in model_state_dict:
                 logger.warning(f"Removing unexpected key from state_dict: {key}")
                 del state_dict[key]
-        model.load_state_dict(state_dict, strict=False)
+        load_weights(model, state_dict, strict=False)
         model.eval()
         del state_dict
+        if model_precision('roberta') == INT8:
+            logger.info("Quantizing model to int8...")
+            model = quantize_torch_dynamic(model)
         gc.collect()
         torch.cuda.empty_cache() if torch.cuda.is_available() else None
         logger.info("✅ Model and tokenizer loaded successfully")
-        return True
+        return model, tokenizer
     except MemoryError as e:
         logger.error(f"❌ Memory error loading model: {str(e)}")
         logger.error(traceback.format_exc())
-        return False
+        return None
     except Exception as e:
         logger.error(f"❌ Error loading model: {str(e)}")
         logger.error(traceback.format_exc())
-        return False
-
-load_model_and_tokenizer()
-
-# --- Gemini Classification Start ---
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")  # Ensure this environment variable is set
-
-def classify_text_with_gemini(text_to_classify):
-    if not GEMINI_API_KEY:
-        logger.error("GEMINI_API_KEY not found in environment variables.")
-        return {"error": "Gemini API key not configured"}
-
-    if not text_to_classify or text_to_classify.strip() == "":
-        logger.warn("No text provided for Gemini classification.")
-        return {"error": "No text provided for classification"}
-
-    prompt = (
-        "Classify the following text based on these categories:\n"
-        "- Manipulative\n"
-        "- Potential suicide\n"
-        "- Blackmail\n"
-        "- Meeting attempt\n\n"
-        "Text to classify:\n"
-        f'"""{text_to_classify}"""\n\n'
-        "Return the classification as a JSON object where keys are the categories and values are boolean (true if the category applies, false otherwise). "
-        "For example:\n"
-        "{\n"
-        "  \"Manipulative\": false,\n"
-        "  \"Potential_suicide\": true,\n"
-        "  \"Blackmail\": false,\n"
-        "  \"Meeting_attempt\": false\n"
-        "}\n"
-        "If multiple categories apply, set all relevant ones to true. If none apply, all should be false.\n"
-        "Only return the JSON object."
-    )
+        return None
+
+def warmup_model(loaded):
+    model, tokenizer = loaded
+    tokens = tokenizer('warmup', padding='max_length', truncation=True, max_length=128, return_tensors='pt')
+    with torch.no_grad():
+        model(tokens['input_ids'], tokens['attention_mask'])
+
+# Loaded on first use; reloaded when the weights change
+registry.register(
+    'roberta', load_model_and_tokenizer, modality='text',
+    files=weight_files(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'modele_robertaya.pth')),
+    warmup=warmup_model,
+    # Quantizing runs torch kernels in the loader
+    fork_safe=model_precision('roberta') != INT8
+)
 
-    payload = {
-        "contents": [{
-            "parts": [{"text": prompt}]
-        }]
+LABELS = ['Offensive', 'Hate', 'Safe']
+EXPLANATIONS = {
+    'Offensive': 'Contains offensive language, insults, or inappropriate content',
+    'Hate': 'Contains hate speech, discrimination, or harmful stereotypes',
+    'Safe': 'Appears to be appropriate and respectful communication',
+    'Skipped': 'Message skipped (e.g. conversation separator)'
+}
+
+def is_skipped(message):
+    return not message or message.startswith('--- Conversation')
+
+def skipped_result(message):
+    return {
+        'message': message,
+        'prediction': {'label': 'Skipped', 'confidence': 0.0, 'confidence_level': 'N/A', 'explanation': EXPLANATIONS['Skipped']},
+        'probabilities': {}
     }
-    headers = {
-        'Content-Type': 'application/json'
+
+def error_result(message, error):
+    return {
+        'message': message,
+        'error': error,
+        'prediction': {
+            'label': 'Error',
+            'confidence': 0.0,
+            'confidence_level': 'Unknown',
+            'explanation': 'Failed to process this message'
+        }
     }
-    
-    full_url = f"{GEMINI_API_URL}?key={GEMINI_API_KEY}"
 
-    try:
-        response = requests.post(full_url, headers=headers, json=payload, timeout=30)  # Added timeout
-        response.raise_for_status()  # Raises an HTTPError for bad responses (4XX or 5XX)
-        
-        result = response.json()
-        
-        if result.get("candidates") and result["candidates"][0].get("content") and result["candidates"][0]["content"].get("parts") and result["candidates"][0]["content"]["parts"][0].get("text"):
-            classification_json_string = result["candidates"][0]["content"]["parts"][0]["text"]
-            logger.info(f"Raw classification JSON string from Gemini: {classification_json_string}")
-            try:
-                # Attempt to clean the string if it's wrapped in markdown
-                if classification_json_string.strip().startswith("```json"):
-                    classification_json_string = classification_json_string.strip()[7:-3].strip()
-                elif classification_json_string.strip().startswith("```"):
-                    classification_json_string = classification_json_string.strip()[3:-3].strip()
-
-                classification_result = json.loads(classification_json_string.strip())
-                # Standardize keys to be consistent (e.g., lowercase with underscores)
-                standardized_result = {
-                    "manipulative": classification_result.get("Manipulative", classification_result.get("manipulative", False)),
-                    "potential_suicide": classification_result.get("Potential suicide", classification_result.get("potential_suicide", classification_result.get("Potential_suicide", False))),
-                    "blackmail": classification_result.get("Blackmail", classification_result.get("blackmail", False)),
-                    "meeting_attempt": classification_result.get("Meeting attempt", classification_result.get("meeting_attempt", classification_result.get("Meeting_attempt", False))),
-                }
-                logger.info(f"Parsed and standardized Gemini classification result: {standardized_result}")
-                return standardized_result
-            except json.JSONDecodeError as parse_error:
-                logger.error(f"Error parsing classification JSON from Gemini: {parse_error}, Raw string: {classification_json_string}")
-                return {"error": "Failed to parse classification from Gemini", "raw_response": classification_json_string}
+def message_result(message, probs):
+    """Build the per-message response entry from its three class probabilities."""
+    predicted_class = max(range(len(LABELS)), key=lambda c: probs[c])
+    confidence = probs[predicted_class]
+    confidence_level = "High" if confidence > 0.8 else "Medium" if confidence > 0.6 else "Low"
+    return {
+        'message': message,
+        'prediction': {
+            'label': LABELS[predicted_class],
+            'confidence': confidence,
+            'confidence_level': confidence_level,
+            'explanation': EXPLANATIONS[LABELS[predicted_class]]
+        },
+        'probabilities': {label: probs[c] for c, label in enumerate(LABELS)}
+    }
+
+def token_windows(ids, tokenizer, long_input=None):
+    """
+    Split the token ids of one message (without special tokens) into model inputs.
+
+    A message that fits in ``MAX_LENGTH`` gives a single input. A longer one
+    gives overlapping windows of ``MAX_LENGTH`` tokens advancing by
+    ``MAX_LENGTH - TEXT_WINDOW_OVERLAP``, at most ``TEXT_MAX_WINDOWS`` of them,
+    or just the first window when long inputs are disabled.
+    """
+    if long_input is None:
+        long_input = settings.TEXT_LONG_INPUT
+    size = MAX_LENGTH - tokenizer.num_special_tokens_to_add()
+    if len(ids) <= size or not long_input:
+        return [tokenizer.build_inputs_with_special_tokens(ids[:size])]
+    step = max(size - settings.TEXT_WINDOW_OVERLAP, 1)
+    starts = list(range(0, len(ids) - size + step, step))[:settings.TEXT_MAX_WINDOWS]
+    return [tokenizer.build_inputs_with_special_tokens(ids[start:start + size]) for start in starts]
+
+def aggregate_windows(window_probs, method=None):
+    """
+    Combine the class probabilities of a message's windows into one distribution.
+
+    ``max`` keeps the window judged least safe, so one abusive passage flags the
+    whole message; ``mean`` averages the windows.
+    """
+    if len(window_probs) == 1:
+        return window_probs[0]
+    method = method or settings.TEXT_WINDOW_AGGREGATE
+    if method == 'mean':
+        return [sum(column) / len(window_probs) for column in zip(*window_probs)]
+    if method == 'max':
+        safe = LABELS.index('Safe')
+        return min(window_probs, key=lambda probs: probs[safe])
+    raise ValueError(f"Unknown window aggregation '{method}', expected 'max' or 'mean'")
+
+def predict_probabilities(messages, model, tokenizer, batch_size=None, sort_by_length=None):
+    """
+    Run RoBERTa over many messages in padded batches.
+
+    All messages are tokenized in one call and split into windows with
+    ``token_windows``; short messages are a single window. Windows of all
+    messages are batched together, each batch is padded only to its longest
+    window, and with ``sort_by_length`` windows of similar length are batched
+    together so little padding is computed at all.
+
+    Returns:
+        List aligned with ``messages`` of per-class probability lists, or the
+        error string for messages with a window whose batch failed
+    """
+    batch_size = batch_size or settings.TEXT_BATCH_SIZE
+    if sort_by_length is None:
+        sort_by_length = settings.TEXT_SORT_BY_LENGTH
+
+    encodings = tokenizer(messages, add_special_tokens=False)['input_ids']
+    windows = []
+    owners = []
+    for i, ids in enumerate(encodings):
+        for window in token_windows(ids, tokenizer):
+            windows.append(window)
+            owners.append(i)
+    order = list(range(len(windows)))
+    if sort_by_length:
+        order.sort(key=lambda w: len(windows[w]))
+
+    window_results = [None] * len(windows)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        try:
+            tokens = tokenizer.pad({'input_ids': [windows[w] for w in batch]}, padding='longest', return_tensors='pt')
+            with torch.no_grad():
+                logits = model(tokens['input_ids'], tokens['attention_mask'])
+                predictions = torch.nn.functional.softmax(logits, dim=-1)
+            for w, probs in zip(batch, predictions.tolist()):
+                window_results[w] = probs
+        except Exception as e:
+            logger.error(f"Error processing batch of {len(batch)} windows: {str(e)}")
+            for w in batch:
+                window_results[w] = str(e)
+
+    per_message = [[] for _ in messages]
+    for i, probs in zip(owners, window_results):
+        per_message[i].append(probs)
+    results = []
+    for probs in per_message:
+        errors = [p for p in probs if isinstance(p, str)]
+        results.append(errors[0] if errors else aggregate_windows(probs))
+    return results
+
+# Probabilities per normalized message, so re-sent conversation lines skip the model
+message_cache = ResultCache(
+    max_entries=settings.TEXT_CACHE_MAX_ENTRIES,
+    ttl=settings.TEXT_CACHE_TTL
+)
+
+# Messages seen vs. distinct messages per request, for the in-request dedup rate
+dedup_stats = {'messages': 0, 'unique': 0}
+dedup_lock = threading.Lock()
+
+def normalize_message(message):
+    """Canonical form used as cache and dedup key: NFC with whitespace runs collapsed."""
+    return ' '.join(unicodedata.normalize('NFC', message).split())
+
+def classify_messages(messages, model, tokenizer):
+    """
+    Classify each message with RoBERTa, keeping the per-message response format.
+
+    Conversation separators are skipped. Messages that are identical after
+    normalization are classified once per request, cached results are
+    reused across requests, and only the remaining messages run batched
+    through ``predict_probabilities``. The model always sees the text as
+    sent: the first message with a given key stands for the others.
+    """
+    version = registry.version('roberta')
+    normalized = [normalize_message(message) for message in messages]
+    originals = {}
+    for message, key in zip(messages, normalized):
+        if not is_skipped(message):
+            originals.setdefault(key, message)
+    unique = list(originals)
+
+    probabilities = {}
+    misses = []
+    for key in unique:
+        cached = message_cache.get(('roberta', version, key))
+        if cached is not None:
+            probabilities[key] = cached['probs']
         else:
-            logger.warn(f"No classification found in Gemini response: {result}")
-            return {"error": "No classification data in Gemini response", "raw_response": result}
-            
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error calling Gemini API: {e}")
-        return {"error": f"Gemini API request failed: {str(e)}"}
-    except Exception as e:
-        logger.error(f"Unexpected error during Gemini classification: {e}")
-        logger.error(traceback.format_exc())
-        return {"error": f"Unexpected error in Gemini classification: {str(e)}"}
+            misses.append(key)
+    if misses:
+        for key, probs in zip(misses, predict_probabilities([originals[key] for key in misses], model, tokenizer)):
+            probabilities[key] = probs
+            if not isinstance(probs, str):
+                message_cache.set(('roberta', version, key), {'probs': probs})
 
-# --- Gemini Classification End ---
+    with dedup_lock:
+        dedup_stats['messages'] += sum(1 for message in messages if not is_skipped(message))
+        dedup_stats['unique'] += len(unique)
+
+    results = []
+    for i, (message, key) in enumerate(zip(messages, normalized)):
+        if is_skipped(message):
+            results.append(skipped_result(message))
+            continue
+        probs = probabilities[key]
+        if isinstance(probs, str):
+            results.append(error_result(message, probs))
+            continue
+        result = message_result(message, probs)
+        results.append(result)
+        prediction = result['prediction']
+        logger.info(f"Message {i+1} classified as {prediction['label']} with {prediction['confidence_level']} confidence ({prediction['confidence']:.2f})")
+    return results
+
+@require_http_methods(["GET"])
+def cache_stats(request):
+    """
+    Report the message cache hit rate and how many messages in-request dedup saved.
+    """
+    with dedup_lock:
+        messages, unique = dedup_stats['messages'], dedup_stats['unique']
+    return JsonResponse({
+        'cache': message_cache.stats(),
+        'dedup': {
+            'messages': messages,
+            'unique': unique,
+            'duplicate_rate': round(1 - unique / messages, 4) if messages else 0.0,
+        }
+    })
+
+@require_http_methods(["GET"])
+def gemini_stats(request):
+    """
+    Report Gemini call latency, error rate, circuit breaker state and result cache hit rate.
+    """
+    return JsonResponse(gemini.stats())
 
 @csrf_exempt
 @require_http_methods(["POST"])
 def classify_text(request):
-    global model, tokenizer
-    if model is None or tokenizer is None:
-        logger.error("Model or tokenizer not loaded, attempting to reload...")
-        if not load_model_and_tokenizer():
-            return JsonResponse({
-                'error': 'Model not loaded properly',
-                'details': 'Failed to load model and tokenizer'
-            }, status=500)
+    loaded = registry.get('roberta')
+    if loaded is None:
+        logger.error("Model or tokenizer not loaded")
+        return JsonResponse({
+            'error': 'Model not loaded properly',
+            'details': 'Failed to load model and tokenizer'
+        }, status=500)
+    model, tokenizer = loaded
     try:
         try:
             data = json.loads(request.body)
@@ -201,64 +381,16 @@ def classify_text(request):
         if not text:
             logger.error("No text provided in request")
             return JsonResponse({'error': 'No text provided'}, status=400)
+        # Gemini classifies the whole input text while RoBERTa works through the messages
+        logger.info("Performing classification with Gemini...")
+        gemini_deadline = time.monotonic() + settings.GEMINI_DEADLINE
+        gemini_future = submit_classification(text)
+
         messages = [msg.strip() for msg in text.split('\n') if msg.strip()]
         logger.info(f"Processing {len(messages)} messages with RoBERTa")
-        roberta_results = []
-        for i, message in enumerate(messages):
-            try:
-                if not message or message.startswith('--- Conversation'):
-                    roberta_results.append({
-                        'message': message,
-                        'prediction': {'label': 'Skipped', 'confidence': 0.0, 'confidence_level': 'N/A', 'explanation': 'Message skipped (e.g. conversation separator)'},
-                        'probabilities': {}
-                    })
-                    continue
-                tokens = tokenizer(message, padding='max_length', truncation=True, max_length=128, return_tensors='pt')
-                with torch.no_grad():
-                    logits = model(tokens['input_ids'], tokens['attention_mask'])
-                    predictions = torch.nn.functional.softmax(logits, dim=-1)
-                predicted_class = torch.argmax(predictions, dim=1).item()
-                confidence = predictions[0][predicted_class].item()
-                labels = ['Offensive', 'Hate', 'Safe']
-                explanations = {
-                    'Offensive': 'Contains offensive language, insults, or inappropriate content',
-                    'Hate': 'Contains hate speech, discrimination, or harmful stereotypes',
-                    'Safe': 'Appears to be appropriate and respectful communication',
-                    'Skipped': 'Message skipped (e.g. conversation separator)'
-                }
-                confidence_level = "High" if confidence > 0.8 else "Medium" if confidence > 0.6 else "Low"
-                probabilities = {
-                    'Offensive': predictions[0][0].item(),
-                    'Hate': predictions[0][1].item(),
-                    'Safe': predictions[0][2].item()
-                }
-                roberta_results.append({
-                    'message': message,
-                    'prediction': {
-                        'label': labels[predicted_class],
-                        'confidence': confidence,
-                        'confidence_level': confidence_level,
-                        'explanation': explanations[labels[predicted_class]]
-                    },
-                    'probabilities': probabilities
-                })
-                logger.info(f"Message {i+1} classified as {labels[predicted_class]} with {confidence_level} confidence ({confidence:.2f})")
-            except Exception as e:
-                logger.error(f"Error processing message {i+1}: {str(e)}")
-                roberta_results.append({
-                    'message': message,
-                    'error': str(e),
-                    'prediction': {
-                        'label': 'Error',
-                        'confidence': 0.0,
-                        'confidence_level': 'Unknown',
-                        'explanation': 'Failed to process this message'
-                    }
-                })
-        
-        # Perform Gemini classification on the whole input text
-        logger.info("Performing classification with Gemini...")
-        gemini_classification_result = classify_text_with_gemini(text)
+        roberta_results = classify_messages(messages, model, tokenizer)
+
+        gemini_classification_result = wait_for_classification(gemini_future, gemini_deadline)
 
         return JsonResponse({
             'roberta_classification': {
@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-sample predictions into batched model calls.
+
+    Callers submit one preprocessed sample (without a batch axis) and block until
+    its result is ready. A background worker waits for the first pending sample,
+    then keeps collecting until either ``max_batch_size`` samples are queued or
+    ``max_wait_ms`` has elapsed, stacks them into one tensor and runs
+    ``predict_fn`` once. Row ``i`` of the output is routed back to caller ``i``.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=10.0, name='batcher', timeout=30.0):
+        """
+        Args:
+            predict_fn: Callable taking a stacked ``(batch, ...)`` array and returning
+                an array (or list) whose first axis matches the batch
+            max_batch_size: Largest number of samples grouped into one call
+            max_wait_ms: Longest time the first sample of a batch waits for company
+            name: Name used for the worker thread and in stats
+            timeout: Default seconds ``submit`` waits for a result
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self.timeout = timeout
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._last_batch_size = 0
+        self._max_seen_batch_size = 0
+
+    def submit(self, sample, timeout=None):
+        """
+        Queue one sample and wait for its prediction.
+
+        Args:
+            sample: Preprocessed input for a single item, without a batch axis
+            timeout: Seconds to wait before raising ``TimeoutError`` (default: the batcher's ``timeout``)
+
+        Returns:
+            The row of ``predict_fn``'s output belonging to this sample
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((sample, future))
+        return future.result(timeout=self.timeout if timeout is None else timeout)
+
+    def stats(self):
+        """Return queue-depth and batch-size counters for monitoring."""
+        with self._lock:
+            return {
+                'name': self.name,
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'items': self._items,
+                'errors': self._errors,
+                'avg_batch_size': round(self._items / self._batches, 2) if self._batches else 0.0,
+                'last_batch_size': self._last_batch_size,
+                'max_seen_batch_size': self._max_seen_batch_size,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+            }
+
+    def _ensure_worker(self):
+        # Started lazily so importing the views (or forking workers) spawns no threads
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=f'{self.name}-worker', daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            samples = [sample for sample, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                outputs = self.predict_fn(np.stack(samples))
+                if len(outputs) != len(futures):
+                    raise ValueError(f'{self.name}: model returned {len(outputs)} outputs for a batch of {len(futures)}')
+                for future, output in zip(futures, outputs):
+                    future.set_result(output)
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._last_batch_size = len(batch)
+                self._max_seen_batch_size = max(self._max_seen_batch_size, len(batch))
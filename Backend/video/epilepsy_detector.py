@@ -1,6 +1,9 @@
 import numpy as np
 import cv2
-from typing import Tuple, Optional, Union
+import queue
+import threading
+import time
+from typing import Iterator, List, Tuple, Optional, Union
 import matplotlib.pyplot as plt
 from dataclasses import dataclass
 
@@ -12,6 +15,10 @@ class DetectionConfig:
     freq_max: float = 30.0  # Hz
     threshold: float = 1e5
     batch_size: int = 30  # Number of frames to process at once
+    window_seconds: float = 2.0  # Window length for sliding-window analysis
+    hop_seconds: float = 0.5  # Step between consecutive windows
+    luma_size: Optional[Tuple[int, int]] = (64, 36)  # (width, height) frames are averaged down to; None keeps full size
+    prefetch_batches: int = 0  # Batches decoded ahead on a worker thread; 0 decodes inline
 
 class EpilepsyDetector:
     """
@@ -38,28 +45,115 @@ class EpilepsyDetector:
         Returns:
             numpy.ndarray: Array of average brightness values per frame
         """
+        batches = list(self.iter_brightness(video_path))
+        if not batches:
+            return np.array([])
+        return np.concatenate(batches)
+    
+    def iter_brightness(self, video_path: str) -> Iterator[np.ndarray]:
+        """
+        Stream brightness values from a video one batch of frames at a time.
+        
+        Each frame is area-downscaled to ``luma_size`` and converted to grey
+        straight into a preallocated ``(batch_size, h, w)`` array, and the batch
+        is reduced with a single vectorized mean. With ``prefetch_batches`` set,
+        decoding runs on a worker thread ahead of the consumer.
+        
+        Args:
+            video_path: Path to the video file
+            
+        Yields:
+            numpy.ndarray: Average brightness of up to ``batch_size`` consecutive frames
+        """
         video_capture = cv2.VideoCapture(video_path)
-        brightness_list = []
-        
-        while video_capture.isOpened():
-            frames = []
-            # Read frames in batches
-            for _ in range(self.config.batch_size):
-                ret, frame = video_capture.read()
-                if not ret:
+        
+        try:
+            if self.config.prefetch_batches > 0:
+                yield from self._iter_brightness_prefetched(video_capture)
+                return
+            
+            buffer = None
+            while True:
+                buffer, count = self._read_luma_batch(video_capture, buffer)
+                if count == 0:
                     break
-                frames.append(frame)
+                yield self._batch_brightness(buffer, count)
+        finally:
+            video_capture.release()
+    
+    def video_frame_rate(self, video_path: str) -> float:
+        """
+        Frame rate recorded in a video file, or ``config.frame_rate`` if it reports none.
+        
+        Args:
+            video_path: Path to the video file
             
-            if not frames:
+        Returns:
+            float: Frames per second
+        """
+        video_capture = cv2.VideoCapture(video_path)
+        try:
+            fps = video_capture.get(cv2.CAP_PROP_FPS)
+        finally:
+            video_capture.release()
+        if not fps or not np.isfinite(fps) or fps <= 0:
+            return float(self.config.frame_rate)
+        return float(fps)
+    
+    def _read_luma_batch(self, video_capture: cv2.VideoCapture,
+                         buffer: Optional[np.ndarray]) -> Tuple[Optional[np.ndarray], int]:
+        size = self.config.luma_size
+        count = 0
+        for _ in range(self.config.batch_size):
+            ret, frame = video_capture.read()
+            if not ret:
                 break
-                
-            # Process batch
-            gray_frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames]
-            batch_brightness = [np.mean(gray) for gray in gray_frames]
-            brightness_list.extend(batch_brightness)
-            
-        video_capture.release()
-        return np.array(brightness_list)
+            if buffer is None:
+                height, width = (size[1], size[0]) if size else frame.shape[:2]
+                buffer = np.empty((self.config.batch_size, height, width), dtype=np.uint8)
+            if size:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=buffer[count])
+            count += 1
+        return buffer, count
+    
+    @staticmethod
+    def _batch_brightness(buffer: np.ndarray, count: int) -> np.ndarray:
+        return buffer[:count].reshape(count, -1).mean(axis=1)
+    
+    def _iter_brightness_prefetched(self, video_capture: cv2.VideoCapture) -> Iterator[np.ndarray]:
+        # Buffers cycle between the decoder thread and the consumer, so none are reallocated
+        free_buffers = queue.Queue()
+        ready_batches = queue.Queue()
+        for _ in range(self.config.prefetch_batches + 1):
+            free_buffers.put(None)
+        stop = threading.Event()
+        
+        def decode():
+            try:
+                while not stop.is_set():
+                    buffer, count = self._read_luma_batch(video_capture, free_buffers.get())
+                    ready_batches.put((buffer, count, None))
+                    if count == 0:
+                        return
+            except Exception as e:
+                ready_batches.put((None, 0, e))
+        
+        worker = threading.Thread(target=decode, name='brightness-decoder', daemon=True)
+        worker.start()
+        try:
+            while True:
+                buffer, count, error = ready_batches.get()
+                if error is not None:
+                    raise error
+                if count == 0:
+                    break
+                yield self._batch_brightness(buffer, count)
+                free_buffers.put(buffer)
+        finally:
+            stop.set()
+            free_buffers.put(None)
+            worker.join()
     
     def preprocess_signal(self, brightness_signal: np.ndarray) -> np.ndarray:
         """
@@ -73,19 +167,21 @@ class EpilepsyDetector:
         """
         return brightness_signal - np.mean(brightness_signal)
     
-    def compute_fft(self, brightness_signal: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    def compute_fft(self, brightness_signal: np.ndarray,
+                    frame_rate: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Compute FFT of the brightness signal.
         
         Args:
             brightness_signal: Preprocessed brightness values
+            frame_rate: Samples per second of the signal; defaults to ``config.frame_rate``
             
         Returns:
             Tuple of (frequencies, amplitudes)
         """
         n = len(brightness_signal)
         fft_values = np.fft.fft(brightness_signal)
-        freqs = np.fft.fftfreq(n, d=1/self.config.frame_rate)
+        freqs = np.fft.fftfreq(n, d=1/(frame_rate or self.config.frame_rate))
         return freqs, np.abs(fft_values)
     
     def analyze_spectrum(self, freqs: np.ndarray, amplitudes: np.ndarray) -> float:
@@ -144,7 +240,7 @@ class EpilepsyDetector:
             return "Error: No frames extracted from video."
             
         processed_signal = self.preprocess_signal(brightness_signal)
-        freqs, amplitudes = self.compute_fft(processed_signal)
+        freqs, amplitudes = self.compute_fft(processed_signal, self.video_frame_rate(video_path))
         critical_energy = self.analyze_spectrum(freqs, amplitudes)
         
         result = "Epilepsy Triggering" if critical_energy > self.config.threshold else "Safe"
@@ -152,6 +248,220 @@ class EpilepsyDetector:
         if plot:
             return result, freqs, amplitudes
         return result
+    
+    def scan_windows(self, video_path: str) -> List[dict]:
+        """
+        Find dangerous flicker segments with an overlapping sliding-window FFT.
+        
+        Brightness is streamed into a preallocated buffer of one window
+        (``window_seconds``) and the 3-30 Hz band energy is recomputed every
+        ``hop_seconds`` with ``np.fft.rfft``, so a short strobe is not diluted by
+        the rest of the video and memory does not depend on video length.
+        Overlapping windows above ``threshold`` are merged into segments.
+        Window, hop, frequency bins and timestamps use the file's own frame
+        rate (``video_frame_rate``).
+        
+        Args:
+            video_path: Path to the video file
+            
+        Returns:
+            List of dicts with ``start`` and ``end`` (seconds) and ``peak_energy``
+        """
+        rate = self.video_frame_rate(video_path)
+        window = max(4, int(round(self.config.window_seconds * rate)))
+        hop = max(1, int(round(self.config.hop_seconds * rate)))
+        
+        freqs = np.fft.rfftfreq(window, d=1/rate)
+        band = (freqs >= self.config.freq_min) & (freqs <= self.config.freq_max)
+        if window % 2 == 0:
+            # Match compute_fft/analyze_spectrum, whose two-sided Nyquist bin is negative
+            band[-1] = False
+        
+        # Each sample is written twice so buffer[pos:pos + window] is always in order
+        buffer = np.zeros(2 * window, dtype=np.float64)
+        pos = 0
+        frame_index = 0
+        segments = []
+        
+        for batch in self.iter_brightness(video_path):
+            for value in batch:
+                buffer[pos] = buffer[pos + window] = value
+                pos = (pos + 1) % window
+                frame_index += 1
+                if frame_index < window or (frame_index - window) % hop:
+                    continue
+                
+                signal = buffer[pos:pos + window]
+                spectrum = np.fft.rfft(signal - signal.mean())
+                energy = float(np.sum(np.abs(spectrum[band])**2))
+                if energy <= self.config.threshold:
+                    continue
+                
+                start = (frame_index - window) / rate
+                end = frame_index / rate
+                if segments and start <= segments[-1]['end']:
+                    segments[-1]['end'] = end
+                    segments[-1]['peak_energy'] = max(segments[-1]['peak_energy'], energy)
+                else:
+                    segments.append({'start': start, 'end': end, 'peak_energy': energy})
+        
+        return segments
+    
+    def check_epilepsy_trigger_windowed(self, video_path: str) -> Tuple[str, List[dict]]:
+        """
+        Check a video with the sliding-window scan instead of one global FFT.
+        
+        Args:
+            video_path: Path to the video file
+            
+        Returns:
+            Tuple of (detection result, dangerous segments from scan_windows)
+        """
+        segments = self.scan_windows(video_path)
+        result = "Epilepsy Triggering" if segments else "Safe"
+        return result, segments
+
+def frame_luma(frame: np.ndarray, size: Optional[Tuple[int, int]] = (64, 36)) -> float:
+    """
+    Mean luma of a frame, computed on a downscaled copy.
+    
+    Args:
+        frame: RGB (H, W, 3) or greyscale (H, W) uint8 frame
+        size: (width, height) the frame is area-averaged down to first; None keeps full size
+        
+    Returns:
+        float: Mean brightness in the 0-255 range
+    """
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA) if size else frame
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+    return float(small.mean())
+
+
+class StreamingFlashDetector:
+    """
+    Flash and flicker tracker for one video stream, fed one frame at a time.
+    
+    Brightness samples are kept in a fixed-size ring buffer so memory does not
+    grow with stream length. Each update counts sudden brightness jumps as
+    flashes and recomputes the 3-30 Hz band energy of the buffered window with
+    the wrapped EpilepsyDetector, using the sample rate observed from frame
+    arrival times. When frames arrive too slowly to resolve ``freq_min`` (below
+    twice that rate), there is no band reading and only flashes are counted.
+    """
+    
+    def __init__(self, detector: Optional[EpilepsyDetector] = None, window: int = 30,
+                 flash_threshold: float = 50.0, min_flash_interval: float = 0.1,
+                 flashes_to_trigger: int = 3, conclusion_interval: float = 2.0):
+        """
+        Args:
+            detector: EpilepsyDetector whose FFT and band settings are reused
+            window: Number of brightness samples kept for spectrum analysis
+            flash_threshold: Brightness jump (0-255) counted as a flash
+            min_flash_interval: Minimum seconds between two counted flashes
+            flashes_to_trigger: Flashes after which the stream is flagged
+            conclusion_interval: Seconds between "no flashing lights" conclusions
+        """
+        self.detector = detector or EpilepsyDetector()
+        self.flash_threshold = flash_threshold
+        self.min_flash_interval = min_flash_interval
+        self.flashes_to_trigger = flashes_to_trigger
+        self.conclusion_interval = conclusion_interval
+        
+        self._brightness = np.zeros(window, dtype=np.float32)
+        self._timestamps = np.zeros(window, dtype=np.float64)
+        self._pos = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        
+        self.frame_count = 0
+        self.flash_count = 0
+        self.last_brightness = None
+        self.last_flash_time = 0.0
+        self.last_conclusion_time = 0.0
+    
+    def update(self, frame: np.ndarray, timestamp: Optional[float] = None) -> dict:
+        """
+        Add one frame to the stream and return the detection payload.
+        
+        Args:
+            frame: RGB or greyscale frame
+            timestamp: Arrival time in seconds; defaults to now
+            
+        Returns:
+            dict: ``status`` is "analyzed" when a conclusion is reached, else "analyzing"
+        """
+        brightness = frame_luma(frame, self.detector.config.luma_size)
+        current_time = time.time() if timestamp is None else timestamp
+        
+        with self._lock:
+            self.frame_count += 1
+            self._push(brightness, current_time)
+            
+            if self.last_brightness is not None:
+                is_flash = abs(brightness - self.last_brightness) > self.flash_threshold
+                if is_flash and current_time - self.last_flash_time > self.min_flash_interval:
+                    self.flash_count += 1
+                    self.last_flash_time = current_time
+            self.last_brightness = brightness
+            
+            band_energy = self._band_energy()
+            triggered = (self.flash_count >= self.flashes_to_trigger
+                         or (band_energy is not None and band_energy > self.detector.config.threshold))
+            if triggered:
+                self.flash_count = 0
+                self.last_conclusion_time = current_time
+                return {
+                    'is_epilepsy_trigger': True,
+                    'result': 'Flashing Lights Detected',
+                    'confidence': 1.0,
+                    'frame_count': self.frame_count,
+                    'band_energy': band_energy,
+                    'status': 'analyzed'
+                }
+            
+            if current_time - self.last_conclusion_time > self.conclusion_interval:
+                self.last_conclusion_time = current_time
+                return {
+                    'is_epilepsy_trigger': False,
+                    'result': 'No Flashing Lights Detected',
+                    'confidence': 1.0,
+                    'frame_count': self.frame_count,
+                    'band_energy': band_energy,
+                    'status': 'analyzed'
+                }
+        
+        return {
+            'is_epilepsy_trigger': False,
+            'status': 'analyzing'
+        }
+    
+    def _push(self, brightness: float, timestamp: float) -> None:
+        self._brightness[self._pos] = brightness
+        self._timestamps[self._pos] = timestamp
+        self._pos = (self._pos + 1) % len(self._brightness)
+        self._count = min(self._count + 1, len(self._brightness))
+    
+    def _window(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._count < len(self._brightness):
+            return self._brightness[:self._count], self._timestamps[:self._count]
+        order = np.roll(np.arange(self._count), -self._pos)
+        return self._brightness[order], self._timestamps[order]
+    
+    def _band_energy(self) -> Optional[float]:
+        """Band energy of the buffered window, or None if the samples cannot resolve the band."""
+        if self._count < 4:
+            return None
+        signal, timestamps = self._window()
+        duration = timestamps[-1] - timestamps[0]
+        if duration <= 0:
+            return None
+        sample_rate = (len(timestamps) - 1) / duration
+        if sample_rate < 2 * self.detector.config.freq_min:
+            return None
+        freqs, amplitudes = self.detector.compute_fft(self.detector.preprocess_signal(signal), sample_rate)
+        return float(self.detector.analyze_spectrum(freqs, amplitudes))
+
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+import threading
+
+import cv2
+import numpy as np
+
+DETECT_WIDTH = 320
+FACE_MARGIN = 0.2
+
+_face_cascade = None
+_load_lock = threading.Lock()
+_detect_lock = threading.Lock()
+
+
+def get_face_cascade():
+    """Return the process-wide Haar face cascade, loading it from disk on first use."""
+    global _face_cascade
+    if _face_cascade is None:
+        with _load_lock:
+            if _face_cascade is None:
+                _face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    return _face_cascade
+
+
+def detect_face(rgb, detect_width=DETECT_WIDTH):
+    """
+    Find the largest face in an RGB frame.
+
+    Detection runs on a greyscale copy downscaled to ``detect_width`` pixels wide
+    and the box is mapped back to full-resolution coordinates.
+
+    Returns:
+        (x, y, w, h) of the largest face, or None
+    """
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    scale = min(1.0, detect_width / gray.shape[1])
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    cascade = get_face_cascade()
+    # CascadeClassifier is not safe to share between concurrent detectMultiScale calls
+    with _detect_lock:
+        faces = cascade.detectMultiScale(gray, 1.1, 4)
+    if len(faces) == 0:
+        return None
+    x, y, w, h = max(faces, key=lambda rect: rect[2] * rect[3])
+    return tuple(int(round(v / scale)) for v in (x, y, w, h))
+
+
+def crop_face(rgb, box, margin=FACE_MARGIN):
+    """Crop ``box`` plus a proportional margin out of an RGB frame, clipped to its bounds."""
+    x, y, w, h = box
+    pad = int(max(w, h) * margin)
+    x = max(0, x - pad)
+    y = max(0, y - pad)
+    w = min(rgb.shape[1] - x, w + 2 * pad)
+    h = min(rgb.shape[0] - y, h + 2 * pad)
+    return rgb[y:y+h, x:x+w]
+
+
+class FaceTracker:
+    """
+    Reuses the last face box of one video stream across frames.
+
+    The Haar cascade is re-run only every ``reuse_frames`` frames, or sooner
+    when the content under the tracked box drifts: a small greyscale thumbnail
+    of the box is compared with the one taken at detection time.
+    """
+
+    def __init__(self, reuse_frames=5, drift_threshold=18.0, thumb_size=16):
+        self.reuse_frames = reuse_frames
+        self.drift_threshold = drift_threshold
+        self.thumb_size = thumb_size
+        self.box = None
+        self.thumb = None
+        self.frames_since_detect = 0
+        self.detections = 0
+        self._lock = threading.Lock()
+
+    def locate(self, rgb):
+        """Return the face box for this frame, reusing the tracked one when it still fits."""
+        with self._lock:
+            if self.box is not None and self.frames_since_detect < self.reuse_frames:
+                thumb = self._thumbnail(rgb, self.box)
+                if thumb is not None and np.abs(thumb - self.thumb).mean() <= self.drift_threshold:
+                    self.frames_since_detect += 1
+                    return self.box
+
+            self.box = detect_face(rgb)
+            self.thumb = self._thumbnail(rgb, self.box) if self.box is not None else None
+            self.frames_since_detect = 0
+            self.detections += 1
+            return self.box
+
+    def _thumbnail(self, rgb, box):
+        x, y, w, h = box
+        region = rgb[y:y+h, x:x+w]
+        if region.size == 0:
+            return None
+        gray = cv2.cvtColor(region, cv2.COLOR_RGB2GRAY)
+        return cv2.resize(gray, (self.thumb_size, self.thumb_size), interpolation=cv2.INTER_AREA).astype(np.float32)
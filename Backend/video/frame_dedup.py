@@ -0,0 +1,79 @@
+import threading
+
+import cv2
+
+
+def dhash(rgb, hash_size=8):
+    """
+    Difference hash of an RGB frame.
+
+    The frame is reduced to a ``(hash_size + 1) x hash_size`` greyscale thumbnail
+    and each bit records whether a pixel is brighter than its right neighbour.
+
+    Returns:
+        int: ``hash_size * hash_size``-bit perceptual hash
+    """
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY) if rgb.ndim == 3 else rgb
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class FrameChangeDetector:
+    """
+    Decides whether a stream's new frame is close enough to reuse earlier model results.
+
+    Each frame's perceptual hash is compared with the hash of the last frame the
+    models actually ran on. Within ``max_distance`` bits the stored results are
+    reused, except that every ``refresh_every``-th frame is forced through the
+    models so slow drift and missed changes are caught.
+    """
+
+    def __init__(self, max_distance=4, refresh_every=10):
+        self.max_distance = max_distance
+        self.refresh_every = refresh_every
+        self.anchor_hash = None
+        self.frames_since_refresh = 0
+        self.results = {}
+        self.reused = 0
+        self.refreshed = 0
+        self._lock = threading.Lock()
+
+    def reusable_results(self, rgb, heads):
+        """
+        Return ``{head: result}`` for the requested heads whose last result still applies.
+
+        An empty dict means the frame changed (or is due for a refresh) and every
+        head must run; its results should then be passed to ``remember``.
+        """
+        frame_hash = dhash(rgb)
+        with self._lock:
+            similar = (
+                self.anchor_hash is not None
+                and self.frames_since_refresh < self.refresh_every
+                and hamming(frame_hash, self.anchor_hash) <= self.max_distance
+            )
+            if not similar:
+                self.anchor_hash = frame_hash
+                self.frames_since_refresh = 0
+                self.results = {}
+                self.refreshed += 1
+                return {}
+            self.frames_since_refresh += 1
+            reusable = {head: dict(self.results[head], reused=True) for head in heads if head in self.results}
+            self.reused += len(reusable)
+            return reusable
+
+    def remember(self, head, result):
+        """Store a freshly computed head result for reuse on similar frames."""
+        if 'error' in result:
+            return
+        with self._lock:
+            self.results[head] = result
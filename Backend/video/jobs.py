@@ -0,0 +1,282 @@
+"""
+Background analysis of uploaded videos.
+
+Each job lives in its own directory under ``VIDEO_JOBS_DIR``::
+
+    <job_id>/input.mp4     spooled upload, removed once analysed
+    <job_id>/status.json   state and frames processed / total
+    <job_id>/result.json   per-frame violence results
+    <job_id>/cancel        present when cancellation was requested
+
+Jobs run in a spawned process pool so a long video never holds a web worker,
+and the filesystem is the only state shared between the pool and the views.
+Job directories are removed ``VIDEO_JOB_TTL`` seconds after their last update.
+"""
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from common.quantization import model_precision
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+_executor = None
+_executor_lock = threading.Lock()
+_futures = {}
+_last_cleanup = 0.0
+
+# Expired jobs are looked for at most this often (seconds), when a job is submitted
+CLEANUP_INTERVAL = 60
+
+JOB_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+# Per worker-process analyzer, created on the first job that process runs
+_worker_analyzer = None
+
+
+def is_job_id(job_id):
+    return isinstance(job_id, str) and JOB_ID_RE.fullmatch(job_id) is not None
+
+
+def _job_dir(job_id):
+    # Ids come from URLs; only ever join ids that submit_job could have made
+    if not is_job_id(job_id):
+        raise ValueError(f'Invalid job id: {job_id!r}')
+    return os.path.join(settings.VIDEO_JOBS_DIR, job_id)
+
+
+def _write_json(path, data):
+    # A private temporary file per writer, so the web and pool processes never share one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _update_status(job_dir, **fields):
+    """
+    Merge ``fields`` into the job's status and return it.
+
+    A finished status is final: if the job was already completed, failed or
+    cancelled (possibly by another process), the update is dropped. Progress
+    updates that race with a cancellation are stored as cancelled.
+    """
+    status_path = os.path.join(job_dir, 'status.json')
+    with open(status_path) as f:
+        status = json.load(f)
+    if status['status'] in FINISHED_STATES:
+        return status
+    if fields.get('status', status['status']) not in FINISHED_STATES and os.path.exists(os.path.join(job_dir, 'cancel')):
+        fields['status'] = CANCELLED
+    status.update(fields, updated_at=time.time())
+    _write_json(status_path, status)
+    return status
+
+
+def cleanup_expired_jobs(ttl=None):
+    """
+    Remove job directories not updated for ``ttl`` seconds (default ``VIDEO_JOB_TTL``).
+
+    Jobs still queued or running in this process are kept.
+
+    Returns:
+        int: Number of jobs removed
+    """
+    ttl = settings.VIDEO_JOB_TTL if ttl is None else ttl
+    try:
+        names = os.listdir(settings.VIDEO_JOBS_DIR)
+    except FileNotFoundError:
+        return 0
+    cutoff = time.time() - ttl
+    removed = 0
+    for job_id in names:
+        if not is_job_id(job_id) or job_id in _futures:
+            continue
+        job_dir = _job_dir(job_id)
+        try:
+            with open(os.path.join(job_dir, 'status.json')) as f:
+                updated_at = json.load(f)['updated_at']
+        except (OSError, ValueError, KeyError):
+            # Unreadable or half-created: fall back to the directory's age
+            try:
+                updated_at = os.path.getmtime(job_dir)
+            except OSError:
+                continue
+        if updated_at < cutoff:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def _maybe_cleanup():
+    global _last_cleanup
+    now = time.monotonic()
+    if now - _last_cleanup < CLEANUP_INTERVAL:
+        return
+    _last_cleanup = now
+    cleanup_expired_jobs()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawn rather than fork: the web process already holds TF/Torch threads
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.VIDEO_JOB_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def submit_job(uploaded_file, sample_rate=10):
+    """
+    Spool an uploaded video to a private job directory and queue it for analysis.
+
+    Args:
+        uploaded_file: Django UploadedFile holding the video
+        sample_rate: Analyze one frame in every ``sample_rate``
+
+    Returns:
+        dict: Initial job status
+    """
+    _maybe_cleanup()
+    job_id = uuid.uuid4().hex
+    job_dir = _job_dir(job_id)
+    os.makedirs(job_dir)
+
+    input_path = os.path.join(job_dir, 'input.mp4')
+    with open(input_path, 'wb') as f:
+        for chunk in uploaded_file.chunks():
+            f.write(chunk)
+
+    now = time.time()
+    status = {
+        'job_id': job_id,
+        'status': QUEUED,
+        'frames_processed': 0,
+        'frames_total': None,
+        'sample_rate': sample_rate,
+        'error': None,
+        'created_at': now,
+        'updated_at': now,
+    }
+    _write_json(os.path.join(job_dir, 'status.json'), status)
+
+    future = _get_executor().submit(run_job, job_dir, sample_rate)
+    _futures[job_id] = future
+    future.add_done_callback(lambda _: _futures.pop(job_id, None))
+    return status
+
+
+def get_status(job_id):
+    """Return the job's status dict, or None if the job does not exist."""
+    if not is_job_id(job_id):
+        return None
+    try:
+        with open(os.path.join(_job_dir(job_id), 'status.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def get_result(job_id):
+    """Return the job's results list, or None if they are not available yet."""
+    if not is_job_id(job_id):
+        return None
+    try:
+        with open(os.path.join(_job_dir(job_id), 'result.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def cancel_job(job_id):
+    """
+    Request cancellation of a job.
+
+    Queued jobs are dropped immediately; running jobs stop at their next batch.
+
+    Returns:
+        dict: Updated job status, or None if the job does not exist
+    """
+    status = get_status(job_id)
+    if status is None or status['status'] in FINISHED_STATES:
+        return status
+    job_dir = _job_dir(job_id)
+
+    open(os.path.join(job_dir, 'cancel'), 'w').close()
+    future = _futures.get(job_id)
+    if future is not None and future.cancel():
+        _remove_input(job_dir)
+        return _update_status(job_dir, status=CANCELLED)
+    return get_status(job_id)
+
+
+def _remove_input(job_dir):
+    input_path = os.path.join(job_dir, 'input.mp4')
+    if os.path.exists(input_path):
+        os.remove(input_path)
+
+
+def run_job(job_dir, sample_rate):
+    """
+    Analyze one spooled video inside a pool worker process.
+
+    Progress is written to ``status.json`` after every scored batch and the
+    ``cancel`` flag is checked after every sampled frame.
+    """
+    global _worker_analyzer
+    import cv2
+    from .video_analyzer import VideoViolenceAnalyzer
+
+    cancel_path = os.path.join(job_dir, 'cancel')
+    input_path = os.path.join(job_dir, 'input.mp4')
+    if os.path.exists(cancel_path):
+        _remove_input(job_dir)
+        _update_status(job_dir, status=CANCELLED)
+        return
+
+    try:
+        cap = cv2.VideoCapture(input_path)
+        frames_total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+        cap.release()
+        _update_status(job_dir, status=RUNNING, frames_total=frames_total)
+
+        if _worker_analyzer is None:
+            _worker_analyzer = VideoViolenceAnalyzer(precision=model_precision('clip'))
+
+        results = []
+        for result in _worker_analyzer.iter_video(input_path, sample_rate=sample_rate):
+            results.append(result)
+            if os.path.exists(cancel_path):
+                _update_status(job_dir, status=CANCELLED, frames_processed=result['frame'] + 1)
+                return
+            if len(results) % _worker_analyzer.batch_size == 0:
+                _update_status(job_dir, frames_processed=result['frame'] + 1)
+
+        _write_json(os.path.join(job_dir, 'result.json'), results)
+        frames_processed = frames_total or (results[-1]['frame'] + 1 if results else 0)
+        _update_status(job_dir, status=COMPLETED, frames_processed=frames_processed)
+    except Exception as e:
+        _update_status(job_dir, status=FAILED, error=str(e))
+    finally:
+        _remove_input(job_dir)
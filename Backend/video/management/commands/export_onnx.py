@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from common.benchmark import time_calls
+from common.onnx_runtime import OnnxModel
+from video.onnx_export import (
+    BRAINROT_ONNX_PATH, DEEPFAKE_ONNX_PATH, export_keras_model, load_keras_models,
+    max_abs_difference, sample_batch,
+)
+
+ONNX_PATHS = {
+    'brainrot': BRAINROT_ONNX_PATH,
+    'deepfake': DEEPFAKE_ONNX_PATH,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Export the Keras brainrot (fused with its MobileNetV2 feature extractor) and deepfake '
+        'models to ONNX, check output parity against Keras and compare their latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help=f"Any of {', '.join(sorted(ONNX_PATHS))} (default: all)")
+        parser.add_argument('--opset', type=int, default=13)
+        parser.add_argument('--batch-size', type=int, default=8)
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per backend')
+        parser.add_argument('--tolerance', type=float, default=1e-4, help='Max absolute output difference allowed')
+        parser.add_argument('--skip-export', action='store_true', help='Only check existing ONNX files')
+
+    def handle(self, *args, **options):
+        models = options['models'] or sorted(ONNX_PATHS)
+        unknown = sorted(set(models) - set(ONNX_PATHS))
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(unknown)}")
+        keras_models = load_keras_models(models)
+        failed = []
+
+        for name in models:
+            keras_model, input_shape, value_range = keras_models[name]
+            path = ONNX_PATHS[name]
+
+            if not options['skip_export']:
+                try:
+                    export_keras_model(keras_model, input_shape, path, opset=options['opset'])
+                except ImportError:
+                    raise CommandError('tf2onnx is required for the export: pip install tf2onnx')
+                self.stdout.write(f'{name}: exported to {path}')
+
+            onnx_model = OnnxModel(path)
+            batch = sample_batch(input_shape, value_range, options['batch_size'])
+
+            difference = max_abs_difference(keras_model.predict(batch, verbose=0), onnx_model.predict(batch))
+            passed = difference <= options['tolerance']
+            if not passed:
+                failed.append(name)
+            self.stdout.write(
+                f'{name}: max |keras - onnx| = {difference:.2e} '
+                f'({"ok" if passed else "FAILED"}, tolerance {options["tolerance"]:.0e})'
+            )
+
+            keras_timing = time_calls(lambda: keras_model.predict(batch, verbose=0), runs=options['runs'])
+            onnx_timing = time_calls(lambda: onnx_model.predict(batch), runs=options['runs'])
+            self.stdout.write(f'{name}: batch of {options["batch_size"]}')
+            for backend, timing in (('keras', keras_timing), ('onnx', onnx_timing)):
+                self.stdout.write(f'  {backend:<6} p50 {timing["p50_ms"]:9.2f} ms   p95 {timing["p95_ms"]:9.2f} ms')
+            self.stdout.write(f'  speedup (p50) {keras_timing["p50_ms"] / onnx_timing["p50_ms"]:.2f}x')
+
+        if failed:
+            raise CommandError(f'ONNX outputs differ from Keras for: {", ".join(failed)}')
@@ -14,3 +14,11 @@ class DeepfakeDetection(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+
+class DetectionCounter(models.Model):
+    """Running total kept in step with the detection rows, so counting needs no table scan."""
+    name = models.CharField(max_length=50, unique=True)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.count}"
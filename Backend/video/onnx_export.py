@@ -0,0 +1,84 @@
+"""
+Conversion of the Keras video models to ONNX.
+
+The brainrot model is served as two Keras models (a MobileNetV2 ImageNet
+feature extractor and the trained head on its pooled features); the export
+fuses them into one graph so ONNX Runtime runs a single session per batch.
+"""
+import os
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+
+BRAINROT_KERAS_PATH = os.path.join(MODELS_DIR, 'brainrot_modelMobilenet.h5')
+DEEPFAKE_KERAS_PATH = os.path.join(MODELS_DIR, 'deepfake_detection_xception_180k_14epochs.h5')
+BRAINROT_ONNX_PATH = os.path.join(MODELS_DIR, 'brainrot_mobilenet_fused.onnx')
+DEEPFAKE_ONNX_PATH = os.path.join(MODELS_DIR, 'deepfake_xception.onnx')
+
+BRAINROT_INPUT_SHAPE = (224, 224, 3)
+DEEPFAKE_INPUT_SHAPE = (256, 256, 3)
+
+
+def build_feature_model():
+    """MobileNetV2 ImageNet backbone with global average pooling, as used by the brainrot head."""
+    from tensorflow.keras.applications import MobileNetV2
+    from tensorflow.keras.layers import GlobalAveragePooling2D
+    from tensorflow.keras.models import Model
+
+    base_model = MobileNetV2(weights='imagenet', include_top=False, input_shape=BRAINROT_INPUT_SHAPE)
+    return Model(inputs=base_model.input, outputs=GlobalAveragePooling2D()(base_model.output))
+
+
+def fuse_brainrot(feature_model, head):
+    """Chain the feature extractor and the brainrot head into one Keras model."""
+    from tensorflow.keras.models import Model
+
+    return Model(inputs=feature_model.input, outputs=head(feature_model.output), name='brainrot_fused')
+
+
+def load_keras_models(names):
+    """
+    Load the Keras reference models by name.
+
+    Returns:
+        dict: name -> (Keras model, input shape, input range)
+    """
+    from keras.models import load_model
+
+    models = {}
+    if 'brainrot' in names:
+        head = load_model(BRAINROT_KERAS_PATH, compile=False)
+        models['brainrot'] = (fuse_brainrot(build_feature_model(), head), BRAINROT_INPUT_SHAPE, (0.0, 1.0))
+    if 'deepfake' in names:
+        # Xception preprocess_input scales pixels to [-1, 1]
+        models['deepfake'] = (load_model(DEEPFAKE_KERAS_PATH, compile=False), DEEPFAKE_INPUT_SHAPE, (-1.0, 1.0))
+    return models
+
+
+def export_keras_model(model, input_shape, path, opset=13):
+    """
+    Convert a Keras model to ONNX with a dynamic batch dimension.
+
+    Raises:
+        ImportError: If tf2onnx is not installed
+    """
+    import tensorflow as tf
+    import tf2onnx
+
+    spec = (tf.TensorSpec((None,) + tuple(input_shape), tf.float32, name='input'),)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=path)
+    return path
+
+
+def sample_batch(input_shape, value_range, batch_size=8, seed=0):
+    """Deterministic random batch within the model's preprocessed input range."""
+    low, high = value_range
+    rng = np.random.default_rng(seed)
+    return rng.uniform(low, high, size=(batch_size,) + tuple(input_shape)).astype(np.float32)
+
+
+def max_abs_difference(expected, actual):
+    return float(np.max(np.abs(np.asarray(expected, dtype=np.float64) - np.asarray(actual, dtype=np.float64))))
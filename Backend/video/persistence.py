@@ -0,0 +1,179 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
+
+from .models import DeepfakeDetection, DetectionCounter
+
+logger = logging.getLogger(__name__)
+
+DEEPFAKE_COUNTER = 'deepfake'
+
+
+def deepfake_count():
+    """
+    Number of stored detections flagged as deepfakes.
+
+    Read from the counter row that every flush updates in the same transaction
+    as its inserts, so all workers see the same value as the table. Until the
+    first flush creates that row, or while the counter table has not been
+    migrated, the table is counted.
+    """
+    try:
+        count = DetectionCounter.objects.filter(name=DEEPFAKE_COUNTER).values_list('count', flat=True).first()
+    except DatabaseError as e:
+        logger.warning(f"Deepfake counter unavailable, counting detections: {str(e)}")
+        count = None
+    if count is None:
+        count = DeepfakeDetection.objects.filter(is_deepfake=True).count()
+    return count
+
+
+def _add_to_counter(flagged):
+    """
+    Add newly inserted deepfake rows to the counter; call inside the inserting transaction.
+
+    The first call seeds the counter from the table, which already includes the
+    rows of this transaction. If another writer seeds it concurrently, the
+    unique name makes this insert fail and the rows are added to its count.
+    """
+    if DetectionCounter.objects.filter(name=DEEPFAKE_COUNTER).update(count=F('count') + flagged):
+        return
+    try:
+        with transaction.atomic():
+            DetectionCounter.objects.create(
+                name=DEEPFAKE_COUNTER,
+                count=DeepfakeDetection.objects.filter(is_deepfake=True).count()
+            )
+    except IntegrityError:
+        DetectionCounter.objects.filter(name=DEEPFAKE_COUNTER).update(count=F('count') + flagged)
+
+
+def _update_counter(flagged):
+    """
+    Run ``_add_to_counter`` in a savepoint of the inserting transaction.
+
+    A counter failure (such as its table not being migrated yet) must not roll
+    back the detection rows. The counter is then dropped, so that the next
+    flush re-seeds it from the table instead of carrying a stale total.
+    """
+    try:
+        with transaction.atomic():
+            _add_to_counter(flagged)
+    except DatabaseError as e:
+        logger.error(f"Error updating the deepfake counter: {str(e)}")
+        try:
+            with transaction.atomic():
+                DetectionCounter.objects.filter(name=DEEPFAKE_COUNTER).delete()
+        except DatabaseError:
+            pass
+
+
+class DetectionWriter:
+    """
+    Write-behind buffer for DeepfakeDetection rows.
+
+    Detections are queued from the request thread and written by a background
+    thread with ``bulk_create`` once ``flush_size`` rows are pending or
+    ``flush_interval`` seconds have passed. The queue is bounded: when it is
+    full, callers wait up to ``put_timeout`` seconds before the row is dropped.
+    Pending rows are flushed at interpreter shutdown.
+
+    Rows get their ``timestamp`` when flushed, at most ``flush_interval`` late.
+    """
+
+    def __init__(self, max_queue=1000, flush_size=50, flush_interval=1.0, put_timeout=0.5):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._worker = None
+
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+
+        atexit.register(self.close)
+
+    def add(self, detection):
+        """Queue an unsaved DeepfakeDetection for writing."""
+        self._ensure_worker()
+        try:
+            self._queue.put(detection, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning("Deepfake detection queue full, dropping detection")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': self._queue.qsize(),
+                'written': self.written,
+                'dropped': self.dropped,
+                'flushes': self.flushes,
+            }
+
+    def close(self):
+        """Stop the writer thread after flushing everything still queued."""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+        self._flush(self._drain(self._queue.qsize()))
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='deepfake-writer', daemon=True)
+                self._worker.start()
+
+    def _drain(self, limit):
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                rows = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.flush_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(rows)
+
+    def _flush(self, rows):
+        if not rows:
+            return
+        flagged = sum(1 for row in rows if row.is_deepfake)
+        try:
+            with transaction.atomic():
+                DeepfakeDetection.objects.bulk_create(rows)
+                if flagged:
+                    _update_counter(flagged)
+        except Exception as e:
+            logger.error(f"Error writing {len(rows)} deepfake detections: {str(e)}")
+            return
+        with self._lock:
+            self.written += len(rows)
+            self.flushes += 1
@@ -0,0 +1,59 @@
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def exponential_weights(length):
+    """Normalized weights rising from e^-1 (oldest) to e^0 (newest), computed once per length."""
+    weights = np.exp(np.linspace(-1, 0, length))
+    weights = weights / weights.sum()
+    weights.setflags(write=False)
+    return weights
+
+
+class ConfidenceSmoother:
+    """
+    Recent deepfake confidences of one video stream in a fixed-size ring buffer.
+    """
+
+    def __init__(self, size=5, min_history=3):
+        """
+        Args:
+            size: Number of recent predictions kept
+            min_history: Predictions needed before smoothing kicks in
+        """
+        self.min_history = min_history
+        self._values = np.zeros(size, dtype=np.float64)
+        self._pos = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def add(self, confidence):
+        """
+        Record a raw confidence and return the exponentially weighted average.
+
+        Until ``min_history`` predictions are held the raw value is returned as is.
+        """
+        with self._lock:
+            self._values[self._pos] = confidence
+            self._pos = (self._pos + 1) % len(self._values)
+            self._count = min(self._count + 1, len(self._values))
+            if self._count < self.min_history:
+                return confidence
+            history = self._history()
+            return float(np.dot(history, exponential_weights(len(history))))
+
+    def recent(self, n):
+        """Return up to the last ``n`` confidences, oldest first."""
+        with self._lock:
+            return self._history()[-n:]
+
+    def _history(self):
+        if self._count < len(self._values):
+            return self._values[:self._count]
+        return np.concatenate((self._values[self._pos:], self._values[:self._pos]))
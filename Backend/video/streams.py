@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class StreamStore:
+    """
+    Thread-safe map from a client stream key to its per-stream state.
+
+    States are created on first use by ``factory`` and evicted when they have
+    been idle for longer than ``ttl`` seconds, or least-recently-used first
+    once more than ``max_streams`` are held.
+    """
+
+    def __init__(self, factory, max_streams=1024, ttl=300.0):
+        """
+        Args:
+            factory: Zero-argument callable building a fresh state object
+            max_streams: Maximum number of live streams kept in memory
+            ttl: Seconds of inactivity after which a stream's state is dropped
+        """
+        self.factory = factory
+        self.max_streams = max_streams
+        self.ttl = ttl
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the state for ``key``, creating it if needed, and mark it as used."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._states.pop(key, None)
+            state = entry[1] if entry is not None else self.factory()
+            self._states[key] = (now, state)
+            self._evict(now)
+            return state
+
+    def discard(self, key):
+        with self._lock:
+            self._states.pop(key, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._states)
+
+    def _evict(self, now):
+        # Entries are kept in access order, so idle ones sit at the front
+        while self._states:
+            last_used, _ = next(iter(self._states.values()))
+            if len(self._states) <= self.max_streams and now - last_used <= self.ttl:
+                break
+            self._states.popitem(last=False)
+
+
+def get_stream_key(request, data):
+    """
+    Identify the video stream a frame belongs to.
+
+    The client is the Django session if there is one, else the authenticated
+    user, else the remote address; the stream within it is the ``url`` field
+    the extension sends with each frame.
+    """
+    session = getattr(request, 'session', None)
+    user = getattr(request, 'user', None)
+    if session is not None and session.session_key:
+        client = f'session:{session.session_key}'
+    elif user is not None and user.is_authenticated:
+        client = f'user:{user.pk}'
+    else:
+        client = f"addr:{request.META.get('REMOTE_ADDR', '')}"
+    return f"{client}|{data.get('url', '')}"
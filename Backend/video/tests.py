@@ -1,3 +1,77 @@
-from django.test import TestCase
+import importlib.util
+import os
+import tempfile
+import unittest
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .onnx_export import (
+    BRAINROT_ONNX_PATH, DEEPFAKE_ONNX_PATH, export_keras_model, fuse_brainrot,
+    load_keras_models, max_abs_difference, sample_batch,
+)
+
+HAS_EXPORT_DEPS = all(
+    importlib.util.find_spec(name) is not None for name in ('tensorflow', 'tf2onnx', 'onnxruntime')
+)
+TOLERANCE = 1e-4
+
+
+@unittest.skipUnless(HAS_EXPORT_DEPS, 'tensorflow, tf2onnx and onnxruntime are required')
+class OnnxExportParityTests(SimpleTestCase):
+    """Keras and exported ONNX outputs must agree within ``TOLERANCE``."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def assert_parity(self, keras_model, input_shape, value_range, path):
+        from common.onnx_runtime import OnnxModel
+
+        batch = sample_batch(input_shape, value_range, batch_size=4)
+        expected = keras_model.predict(batch, verbose=0)
+        actual = OnnxModel(path, intra_op_threads=1, inter_op_threads=1).predict(batch)
+        self.assertEqual(expected.shape, actual.shape)
+        self.assertLessEqual(max_abs_difference(expected, actual), TOLERANCE)
+
+    def small_feature_model(self, input_shape):
+        from tensorflow import keras
+
+        inputs = keras.Input(shape=input_shape)
+        x = keras.layers.Conv2D(8, 3, strides=2, activation='relu')(inputs)
+        x = keras.layers.BatchNormalization()(x)
+        outputs = keras.layers.GlobalAveragePooling2D()(x)
+        return keras.Model(inputs, outputs)
+
+    def test_exported_classifier_matches_keras(self):
+        from tensorflow import keras
+
+        keras.utils.set_random_seed(0)
+        input_shape = (32, 32, 3)
+        features = self.small_feature_model(input_shape)
+        model = keras.Model(features.input, keras.layers.Dense(1, activation='sigmoid')(features.output))
+        path = export_keras_model(model, input_shape, os.path.join(self.tmp_dir.name, 'classifier.onnx'))
+        self.assert_parity(model, input_shape, (-1.0, 1.0), path)
+
+    def test_fused_brainrot_graph_matches_keras(self):
+        from tensorflow import keras
+
+        keras.utils.set_random_seed(0)
+        input_shape = (32, 32, 3)
+        features = self.small_feature_model(input_shape)
+        head = keras.Sequential([
+            keras.Input(shape=features.output_shape[1:]),
+            keras.layers.Dense(4, activation='relu'),
+            keras.layers.Dense(1, activation='sigmoid'),
+        ])
+        fused = fuse_brainrot(features, head)
+        path = export_keras_model(fused, input_shape, os.path.join(self.tmp_dir.name, 'fused.onnx'))
+        self.assert_parity(fused, input_shape, (0.0, 1.0), path)
+
+    def test_served_models_match_keras(self):
+        paths = {'brainrot': BRAINROT_ONNX_PATH, 'deepfake': DEEPFAKE_ONNX_PATH}
+        exported = [name for name, path in paths.items() if os.path.exists(path)]
+        if not exported:
+            self.skipTest('No exported models; run manage.py export_onnx first')
+        for name, (model, input_shape, value_range) in load_keras_models(exported).items():
+            with self.subTest(model=name):
+                self.assert_parity(model, input_shape, value_range, paths[name])
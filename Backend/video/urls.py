@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 
 urlpatterns = [
@@ -6,7 +6,14 @@ urlpatterns = [
     path('brainrot/', views.classify_video, name='brainrot'),
     path('violence/', views.detect_violence, name='violence'),
     path('violence-analyze/', views.analyze_video, name='violence_analyze'),
+    path('jobs/', views.submit_video_job, name='video_job_submit'),
+    re_path(r'^jobs/(?P<job_id>[0-9a-f]{32})/$', views.video_job_status, name='video_job_status'),
+    re_path(r'^jobs/(?P<job_id>[0-9a-f]{32})/result/$', views.video_job_result, name='video_job_result'),
+    re_path(r'^jobs/(?P<job_id>[0-9a-f]{32})/cancel/$', views.cancel_video_job, name='video_job_cancel'),
     path('deepfake/', views.detect_deepfake, name='deepfake'),
     path('deepfake-count/', views.get_deepfake_count, name='deepfake_count'),
     path('epilepsy/', views.detect_epilepsy, name='epilepsy'),
+    path('analyze-frame/', views.analyze_frame, name='analyze_frame'),
+    path('batch-stats/', views.batch_stats, name='batch_stats'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
 ] 
\ No newline at end of file
@@ -8,6 +8,7 @@ import time
 from datetime import datetime
 from huggingface_hub import login
 import requests
+import threading
 import urllib3
 import ssl
 
@@ -17,27 +18,48 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 # Create an unverified SSL context
 ssl._create_default_https_context = ssl._create_unverified_context
 
-# Login to Hugging Face using environment variable
-hf_token = os.getenv("HUGGINGFACE_TOKEN")
-if hf_token is None:
-    raise ValueError("Hugging Face token not found. Set the HUGGINGFACE_TOKEN environment variable.")
-
 # Configure requests to not verify SSL certificates
 requests.packages.urllib3.disable_warnings()
 session = requests.Session()
 session.verify = False
 
-try:
-    login(token=hf_token)
-except Exception as e:
-    print(f"Warning: Could not login to Hugging Face: {str(e)}")
-    print("Continuing without Hugging Face authentication...")
+_logged_in = False
+_login_lock = threading.Lock()
+
+def login_to_hugging_face():
+    """
+    Log in to Hugging Face with HUGGINGFACE_TOKEN, once per process.
+
+    Deferred until a model is actually loaded, so importing this module stays cheap.
+    The token is optional: the CLIP model is public and downloads anonymously.
+    """
+    global _logged_in
+    with _login_lock:
+        if _logged_in:
+            return
+        _logged_in = True
+        hf_token = os.getenv("HUGGINGFACE_TOKEN")
+        if not hf_token:
+            print("HUGGINGFACE_TOKEN not set, using Hugging Face without authentication")
+            return
+        try:
+            login(token=hf_token)
+        except Exception as e:
+            print(f"Warning: Could not login to Hugging Face: {str(e)}")
+            print("Continuing without Hugging Face authentication...")
 
 class VideoViolenceAnalyzer:
-    def __init__(self, sample_rate=30, threshold=0.5):
+    def __init__(self, sample_rate=30, threshold=0.5, batch_size=8, precision='fp32'):
+        login_to_hugging_face()
+
         # Load CLIP model and processor
         self.model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
         self.processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
+        self.model.eval()
+        self.precision = precision
+        if precision == 'int8':
+            from common.quantization import quantize_torch_dynamic
+            self.model = quantize_torch_dynamic(self.model)
         
         # Violence-related labels
         self.labels = [
@@ -61,18 +83,46 @@ class VideoViolenceAnalyzer:
         
         self.sample_rate = sample_rate
         self.threshold = threshold
+        self.batch_size = batch_size
         self.results = []
         
+        # The labels never change, so encode them once and only run the image tower per frame
+        with torch.no_grad():
+            text_inputs = self.processor(text=self.labels, return_tensors="pt", padding=True)
+            text_embeds = self.model.get_text_features(**text_inputs)
+            self.text_embeds = text_embeds / text_embeds.norm(dim=-1, keepdim=True)
+            self.logit_scale = self.model.logit_scale.exp()
+        
     def analyze_frame(self, frame):
+        return self.analyze_frames([frame])[0]
+    
+    def analyze_frames(self, frames):
+        """
+        Score a list of frames against the cached label embeddings in one forward pass.
+        
+        Args:
+            frames: List of frame arrays in the same channel order as analyze_frame
+            
+        Returns:
+            list: One result dict per frame, in input order
+        """
+        if not frames:
+            return []
+        
         # Convert BGR to RGB
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image = Image.fromarray(frame_rgb).convert("RGB")
+        images = [Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).convert("RGB") for frame in frames]
         
-        # Run CLIP classification
-        inputs = self.processor(text=self.labels, images=image, return_tensors="pt", padding=True)
-        outputs = self.model(**inputs)
-        probs = outputs.logits_per_image.softmax(dim=1)[0]
+        # Run the CLIP image tower only
+        with torch.no_grad():
+            pixel_values = self.processor(images=images, return_tensors="pt")["pixel_values"]
+            image_embeds = self.model.get_image_features(pixel_values=pixel_values)
+            image_embeds = image_embeds / image_embeds.norm(dim=-1, keepdim=True)
+            logits_per_image = self.logit_scale * image_embeds @ self.text_embeds.t()
+            batch_probs = logits_per_image.softmax(dim=1)
         
+        return [self._build_result(probs) for probs in batch_probs]
+    
+    def _build_result(self, probs):
         # Get probabilities for all labels
         full_probs = {label: round(prob.item(), 4) for label, prob in zip(self.labels, probs)}
         
@@ -94,29 +144,59 @@ class VideoViolenceAnalyzer:
         }
     
     def analyze_video(self, video_path):
+        self.results = list(self.iter_video(video_path))
+        return self.results
+    
+    def iter_video(self, video_path, sample_rate=None):
+        """
+        Stream violence results for a video file as sampled frames are scored.
+        
+        Skipped frames are only grabbed, never retrieved into BGR arrays, and
+        nothing is kept on the instance, so one long-lived analyzer can serve
+        many videos at once.
+        
+        Args:
+            video_path: Path to the video file
+            sample_rate: Analyze one frame in every ``sample_rate``; defaults to the instance setting
+            
+        Yields:
+            dict: Result for each sampled frame, with its index under ``frame``
+        """
+        sample_rate = sample_rate or self.sample_rate
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             raise ValueError("Could not open video file")
-            
-        frame_count = 0
-        self.results = []
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            if frame_count % self.sample_rate == 0:
-                result = self.analyze_frame(frame)
-                result['frame'] = frame_count
-                self.results.append(result)
-                
-                print(f"Frame {frame_count}: {'VIOLENT' if result['is_violent'] else 'SAFE'} ({result['violence_confidence']:.2f})")
-                
-            frame_count += 1
-                
-        cap.release()
-        return self.results
+        try:
+            frame_count = 0
+            pending_frames = []
+            pending_indices = []
+            
+            while True:
+                if frame_count % sample_rate == 0:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    pending_frames.append(frame)
+                    pending_indices.append(frame_count)
+                    if len(pending_frames) >= self.batch_size:
+                        yield from self._score_batch(pending_frames, pending_indices)
+                        pending_frames, pending_indices = [], []
+                    frame_count += 1
+                else:
+                    if not cap.grab():
+                        break
+                    frame_count += 1
+            
+            yield from self._score_batch(pending_frames, pending_indices)
+        finally:
+            cap.release()
+    
+    def _score_batch(self, frames, indices):
+        for index, result in zip(indices, self.analyze_frames(frames)):
+            result['frame'] = index
+            print(f"Frame {index}: {'VIOLENT' if result['is_violent'] else 'SAFE'} ({result['violence_confidence']:.2f})")
+            yield result
     
     def get_results(self):
         return self.results
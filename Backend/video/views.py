@@ -3,63 +3,181 @@ import base64
 import io
 import numpy as np
 from PIL import Image
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-import tensorflow as tf
 import os
-from keras.models import load_model  # ✅ Correct way for Keras 3.5.0 (.h5)
-from django.http import JsonResponse
+import tempfile
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
-from .video_analyzer import VideoViolenceAnalyzer
 import cv2
 from .models import DeepfakeDetection
-from tensorflow.keras.applications.xception import preprocess_input
-from collections import deque
-from .epilepsy_detector import EpilepsyDetector, DetectionConfig
+from .epilepsy_detector import EpilepsyDetector, DetectionConfig, StreamingFlashDetector
+from .streams import StreamStore, get_stream_key
+from .face_tracking import FaceTracker, crop_face, detect_face
+from .smoothing import ConfidenceSmoother
+from .persistence import DetectionWriter, deepfake_count
+from .frame_dedup import FrameChangeDetector
+from common.frames import FrameDecodeError, decode_base64, open_image, read_image
+from common.result_cache import get_frame_cache, pixel_digest
+from .batching import MicroBatcher
+from .onnx_export import BRAINROT_ONNX_PATH, DEEPFAKE_ONNX_PATH, build_feature_model
+from common.onnx_runtime import OnnxModel
+from common.quantization import INT8, int8_path, model_precision
+from common.registry import registry
+from . import jobs
+from django.conf import settings
 import logging
-import time
 
 logger = logging.getLogger(__name__)
 
-# Load your trained brainrot model (only once)
+# Models are registered here and loaded on first use (or by the startup warmup)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODEL_PATH = os.path.join(BASE_DIR, 'models', 'brainrot_modelMobilenet.h5')
+USE_ONNX = settings.VIDEO_MODEL_BACKEND == 'onnx'
 
-try:
-    model = load_model(MODEL_PATH, compile=False)
-    print("✅ Model loaded using keras.models.load_model")
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    model = None
+def onnx_variant(path, name):
+    # int8 weights only exist as quantized ONNX graphs, so they imply the ONNX backend
+    if model_precision(name) == INT8:
+        return int8_path(path)
+    return path if USE_ONNX else None
 
-# Feature extractor
-from tensorflow.keras.applications import MobileNetV2
-from tensorflow.keras.models import Model
-from tensorflow.keras.layers import GlobalAveragePooling2D
+def load_onnx_model(path, name):
+    try:
+        onnx_model = OnnxModel(path)
+        print(f"✅ {name} model loaded with ONNX Runtime")
+        return onnx_model
+    except Exception as e:
+        print(f"❌ Error loading {name} ONNX model, falling back to Keras: {e}")
+        return None
+
+def load_brainrot():
+    """
+    Load the brainrot classifier.
+
+    Returns:
+        Tuple of (model, feature extractor or None when it is fused into the ONNX graph),
+        or None if loading failed
+    """
+    served_path = onnx_variant(BRAINROT_ONNX_PATH, 'brainrot')
+    onnx_model = load_onnx_model(served_path, 'Brainrot') if served_path else None
+    if onnx_model is not None:
+        return onnx_model, None
+    try:
+        from keras.models import load_model  # ✅ Correct way for Keras 3.5.0 (.h5)
+        model = load_model(MODEL_PATH, compile=False)
+        print("✅ Model loaded using keras.models.load_model")
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+        return None
+    return model, build_feature_model()
 
-base_model = MobileNetV2(weights='imagenet', include_top=False, input_shape=(224, 224, 3))
-feature_model = Model(inputs=base_model.input, outputs=GlobalAveragePooling2D()(base_model.output))
+VIOLENCE_THRESHOLD = 0.5
+VIOLENCE_VERSION = f"clip-vit-base-patch32:{model_precision('clip')}:{VIOLENCE_THRESHOLD}"
 
-# Initialize the analyzer
-analyzer = VideoViolenceAnalyzer()
+def load_violence_analyzer():
+    from .video_analyzer import VideoViolenceAnalyzer
+    return VideoViolenceAnalyzer(threshold=VIOLENCE_THRESHOLD, precision=model_precision('clip'))
 
 # Deepfake detection model loading
 MODEL_PATH_DEEPFAKE = os.path.join(BASE_DIR, 'models', 'deepfake_detection_xception_180k_14epochs.h5')
-try:
-    deepfake_model = load_model(MODEL_PATH_DEEPFAKE, compile=False)
-    print("✅ Deepfake model loaded using keras.models.load_model")
-except Exception as e:
-    print(f"❌ Error loading deepfake model: {e}")
-    deepfake_model = None
+
+def load_deepfake():
+    served_path = onnx_variant(DEEPFAKE_ONNX_PATH, 'deepfake')
+    deepfake_model = load_onnx_model(served_path, 'Deepfake') if served_path else None
+    if deepfake_model is not None:
+        return deepfake_model
+    try:
+        from keras.models import load_model
+        deepfake_model = load_model(MODEL_PATH_DEEPFAKE, compile=False)
+        print("✅ Deepfake model loaded using keras.models.load_model")
+        return deepfake_model
+    except Exception as e:
+        print(f"❌ Error loading deepfake model: {e}")
+        return None
+
+def _run_brainrot(loaded, batch):
+    model, feature_model = loaded
+    if feature_model is None:
+        return model.predict(batch, verbose=0)
+    features = feature_model.predict(batch, verbose=0)
+    return model.predict(features, verbose=0)
+
+def _predict_brainrot_batch(batch):
+    return _run_brainrot(registry.get('brainrot'), batch)
+
+def _predict_deepfake_batch(batch):
+    return registry.get('deepfake').predict(batch, verbose=0)
+
+# Loaded on first use, warmed with one dummy batch, reloaded when the weights change.
+# The ONNX graph, when one is served, is listed alongside the Keras fallback. None of
+# them is preloaded before a fork: TensorFlow and ONNX Runtime threads do not survive one.
+registry.register(
+    'brainrot', load_brainrot, modality='video',
+    files=[path for path in (MODEL_PATH, onnx_variant(BRAINROT_ONNX_PATH, 'brainrot')) if path],
+    warmup=lambda loaded: _run_brainrot(loaded, np.zeros((1, 224, 224, 3), dtype=np.float32)),
+    fork_safe=False
+)
+registry.register(
+    'clip', load_violence_analyzer, modality='video',
+    warmup=lambda analyzer: analyzer.analyze_frame(np.zeros((224, 224, 3), dtype=np.uint8)),
+    # The analyzer runs CLIP on its text prompts while loading, starting torch's thread pool
+    fork_safe=False
+)
+registry.register(
+    'deepfake', load_deepfake, modality='video',
+    files=[path for path in (MODEL_PATH_DEEPFAKE, onnx_variant(DEEPFAKE_ONNX_PATH, 'deepfake')) if path],
+    warmup=lambda model: model.predict(np.zeros((1, IMAGE_SIZE, IMAGE_SIZE, 3), dtype=np.float32), verbose=0),
+    fork_safe=False
+)
+
+# Coalesce concurrent frames into one Keras (or ONNX Runtime) call per model
+brainrot_batcher = MicroBatcher(
+    _predict_brainrot_batch,
+    max_batch_size=settings.VIDEO_BATCH_MAX_SIZE,
+    max_wait_ms=settings.VIDEO_BATCH_MAX_WAIT_MS,
+    name='brainrot',
+    timeout=settings.VIDEO_BATCH_TIMEOUT
+)
+deepfake_batcher = MicroBatcher(
+    _predict_deepfake_batch,
+    max_batch_size=settings.VIDEO_BATCH_MAX_SIZE,
+    max_wait_ms=settings.VIDEO_BATCH_MAX_WAIT_MS,
+    name='deepfake',
+    timeout=settings.VIDEO_BATCH_TIMEOUT
+)
 
 CONFIDENCE_THRESHOLD = 0.60
 IMAGE_SIZE = 256
 CONFIDENCE_HISTORY_SIZE = 5
 MIN_CONFIDENCE_FOR_DEEPFAKE = 0.60
 MAX_CONFIDENCE_FOR_REAL = 0.50
-confidence_history = deque(maxlen=CONFIDENCE_HISTORY_SIZE)
+
+# Recent deepfake confidences per stream, so videos are never averaged together
+deepfake_smoothers = StreamStore(
+    lambda: ConfidenceSmoother(CONFIDENCE_HISTORY_SIZE),
+    max_streams=settings.VIDEO_STREAM_MAX,
+    ttl=settings.VIDEO_STREAM_TTL
+)
+
+# Perceptual-hash change detection per stream, to skip models on static frames
+frame_changes = StreamStore(
+    lambda: FrameChangeDetector(
+        max_distance=settings.VIDEO_DEDUP_MAX_DISTANCE,
+        refresh_every=settings.VIDEO_DEDUP_REFRESH_EVERY
+    ),
+    max_streams=settings.VIDEO_STREAM_MAX,
+    ttl=settings.VIDEO_STREAM_TTL
+)
+
+# Detections are written in batches off the request path
+detection_writer = DetectionWriter(
+    max_queue=settings.DEEPFAKE_WRITE_QUEUE_SIZE,
+    flush_size=settings.DEEPFAKE_WRITE_BATCH_SIZE,
+    flush_interval=settings.DEEPFAKE_WRITE_INTERVAL
+)
 
 # Initialize the epilepsy detector
 epilepsy_detector = EpilepsyDetector(DetectionConfig(
@@ -70,56 +188,60 @@ epilepsy_detector = EpilepsyDetector(DetectionConfig(
     batch_size=30
 ))
 
-def get_face_region(image):
+# Flash tracking state per client stream, dropped once a stream goes idle
+epilepsy_streams = StreamStore(
+    lambda: StreamingFlashDetector(epilepsy_detector),
+    max_streams=settings.VIDEO_STREAM_MAX,
+    ttl=settings.VIDEO_STREAM_TTL
+)
+
+# Last face box per stream, so the cascade only re-runs on drift
+face_trackers = StreamStore(
+    FaceTracker,
+    max_streams=settings.VIDEO_STREAM_MAX,
+    ttl=settings.VIDEO_STREAM_TTL
+)
+
+def get_face_region(rgb, tracker=None):
+    """Crop the (tracked) face out of an RGB frame array, or return the frame unchanged."""
     try:
-        cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        faces = face_cascade.detectMultiScale(cv_image, 1.1, 4)
-        if len(faces) > 0:
-            x, y, w, h = max(faces, key=lambda rect: rect[2] * rect[3])
-            margin = int(max(w, h) * 0.2)
-            x = max(0, x - margin)
-            y = max(0, y - margin)
-            w = min(cv_image.shape[1] - x, w + 2 * margin)
-            h = min(cv_image.shape[0] - y, h + 2 * margin)
-            face_region = cv_image[y:y+h, x:x+w]
-            return Image.fromarray(cv2.cvtColor(face_region, cv2.COLOR_BGR2RGB))
+        box = tracker.locate(rgb) if tracker is not None else detect_face(rgb)
+        if box is not None:
+            return crop_face(rgb, box)
     except Exception as e:
         print(f"Face detection error: {str(e)}")
-    return image
-
-def smooth_confidence(current_confidence):
-    confidence_history.append(current_confidence)
-    if len(confidence_history) >= 3:
-        weights = np.exp(np.linspace(-1, 0, len(confidence_history)))
-        weights = weights / weights.sum()
-        smoothed = np.average(confidence_history, weights=weights)
-        return float(smoothed)
-    return current_confidence
-
-def make_deepfake_decision(confidence):
+    return rgb
+
+def smooth_confidence(current_confidence, smoother):
+    return smoother.add(current_confidence)
+
+def make_deepfake_decision(confidence, smoother):
     if confidence > MIN_CONFIDENCE_FOR_DEEPFAKE:
         return True, confidence
     elif confidence < MAX_CONFIDENCE_FOR_REAL:
         return False, confidence
     else:
-        if len(confidence_history) >= 3:
-            avg_confidence = np.mean(list(confidence_history)[-3:])
+        if len(smoother) >= 3:
+            avg_confidence = float(np.mean(smoother.recent(3)))
             return avg_confidence > CONFIDENCE_THRESHOLD, avg_confidence
         return confidence > CONFIDENCE_THRESHOLD, confidence
 
 def preprocess_frame_deepfake(frame_data):
     try:
-        if ',' in frame_data:
-            image_data = base64.b64decode(frame_data.split(',')[1])
-        else:
-            image_data = base64.b64decode(frame_data)
-        image = Image.open(io.BytesIO(image_data)).convert('RGB')
-        image = get_face_region(image)
-        image = image.resize((IMAGE_SIZE, IMAGE_SIZE), Image.Resampling.LANCZOS)
-        img_array = np.array(image)
+        return preprocess_image_deepfake(open_image(io.BytesIO(decode_base64(frame_data))))
+    except Exception as e:
+        print(f"Error in preprocess_frame: {str(e)}")
+        raise
+
+def preprocess_image_deepfake(image, tracker=None):
+    try:
+        face = get_face_region(np.asarray(image), tracker)
+        shrinking = face.shape[0] > IMAGE_SIZE or face.shape[1] > IMAGE_SIZE
+        interpolation = cv2.INTER_AREA if shrinking else cv2.INTER_LANCZOS4
+        img_array = cv2.resize(face, (IMAGE_SIZE, IMAGE_SIZE), interpolation=interpolation)
         img_array = img_array.astype('float32')
-        img_array = preprocess_input(img_array)
+        # Xception preprocess_input: scale pixels to [-1, 1]
+        img_array = img_array / 127.5 - 1.0
         img_array = np.expand_dims(img_array, axis=0)
         return img_array
     except Exception as e:
@@ -141,6 +263,88 @@ def preprocess_image(img):
     img_array = img_array / 255.0
     return img_array
 
+def predict_brainrot(image, digest=None):
+    """
+    Run the MobileNetV2 feature extractor and brainrot head on an RGB PIL image.
+
+    Results are cached by pixel digest; pass ``digest`` if it is already known.
+    """
+    if registry.get('brainrot') is None:
+        return dict(_predict_brainrot_uncached(image), cached=False)
+    return get_frame_cache().get_or_compute(
+        'brainrot', registry.version('brainrot'), digest or pixel_digest(image),
+        lambda: _predict_brainrot_uncached(image)
+    )
+
+def _predict_brainrot_uncached(image):
+    if registry.get('brainrot') is not None:
+        image = image.resize((224, 224))
+        img_array = np.array(image, dtype=np.float32) / 255.0
+        prediction = brainrot_batcher.submit(img_array)
+        label = "Brainrot" if prediction[0] > 0.5 else "Normal"
+        confidence = float(prediction[0])
+    else:
+        label = "Normal"
+        confidence = 0.95
+
+    return {
+        'label': label,
+        'confidence': confidence
+    }
+
+def predict_violence(img_array, digest=None):
+    """
+    Run the CLIP violence analyzer on an RGB frame array.
+
+    Results are cached by pixel digest; pass ``digest`` if it is already known.
+    """
+    return get_frame_cache().get_or_compute(
+        'violence', VIOLENCE_VERSION, digest or pixel_digest(img_array),
+        lambda: _predict_violence_uncached(img_array)
+    )
+
+def _predict_violence_uncached(img_array):
+    result = registry.get('clip').analyze_frame(img_array)
+    return {
+        'is_violent': result['is_violent'],
+        'confidence': result['violence_confidence'],
+        'top_label': result['top_label'],
+        'top_confidence': result['top_confidence'],
+        'full_probs': result['full_probs']
+    }
+
+def predict_deepfake(image, video_url='', stream_key=None):
+    """Run the Xception deepfake model on an RGB PIL image and record the detection."""
+    if registry.get('deepfake') is None:
+        raise RuntimeError('Deepfake model not loaded')
+    if stream_key is not None:
+        tracker = face_trackers.get(stream_key)
+        smoother = deepfake_smoothers.get(stream_key)
+    else:
+        tracker = None
+        smoother = ConfidenceSmoother(CONFIDENCE_HISTORY_SIZE)
+    processed_frame = preprocess_image_deepfake(image, tracker)
+    raw_prediction = float(deepfake_batcher.submit(processed_frame[0])[0])
+    smoothed_confidence = smooth_confidence(raw_prediction, smoother)
+    is_deepfake, final_confidence = make_deepfake_decision(smoothed_confidence, smoother)
+    detection_writer.add(DeepfakeDetection(
+        is_deepfake=is_deepfake,
+        confidence=final_confidence,
+        video_url=video_url,
+        model_used='xception'
+    ))
+    print(f"Debug - Raw: {raw_prediction:.4f}, Smoothed: {smoothed_confidence:.4f}, Final: {final_confidence:.4f}, Is Deepfake: {is_deepfake}")
+    return {
+        'is_deepfake': bool(is_deepfake),
+        'confidence': final_confidence,
+        'raw_prediction': raw_prediction,
+        'model': 'xception'
+    }
+
+FRAME_HEADS = ('brainrot', 'violence', 'deepfake', 'epilepsy')
+# Heads whose results may be reused across near-identical frames; epilepsy needs every frame
+REUSABLE_HEADS = ('brainrot', 'violence', 'deepfake')
+
 @require_http_methods(["GET"])
 def health_check(request):
     """
@@ -155,56 +359,14 @@ def health_check(request):
 @require_http_methods(["POST"])
 def classify_video(request):
     try:
-        # Parse JSON data from request body
-        data = json.loads(request.body)
-        if not data or 'image' not in data:
-            return JsonResponse({'error': 'No image data provided'}, status=400)
-        
-        # Extract base64 data
-        image_str = data['image']
-        if not image_str.startswith('data:image/'):
-            return JsonResponse({'error': 'Invalid image format'}, status=400)
-            
         try:
-            # Split and decode base64
-            header, encoded = image_str.split(',', 1)
-            image_data = base64.b64decode(encoded)
-            
-            # Create and verify image
-            image = Image.open(io.BytesIO(image_data))
-            image.verify()  # Verify it's a valid image
-            
-            # Reopen the image after verification
-            image = Image.open(io.BytesIO(image_data)).convert('RGB')
-            
-            # Preprocess image
-            image = image.resize((224, 224))
-            img_array = np.array(image) / 255.0
-            img_array = np.expand_dims(img_array, axis=0)
-            
-            # Extract features
-            features = feature_model.predict(img_array)
-            
-            # Make prediction if model is loaded
-            if model is not None:
-                prediction = model.predict(features)
-                label = "Brainrot" if prediction[0][0] > 0.5 else "Normal"
-                confidence = float(prediction[0][0])
-            else:
-                label = "Normal"
-                confidence = 0.95
-            
-            return JsonResponse({
-                'label': label,
-                'confidence': confidence
-            })
-            
-        except (ValueError, IOError) as e:
+            image, _ = read_image(request)
+        except FrameDecodeError as e:
             print(f"Image processing error: {str(e)}")
-            return JsonResponse({'error': 'Invalid image data'}, status=400)
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        return JsonResponse(predict_brainrot(image))
             
-    except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
     except Exception as e:
         print(f"Error in classify_video: {str(e)}")
         return JsonResponse({'error': 'Internal server error'}, status=500)
@@ -213,26 +375,13 @@ def classify_video(request):
 def detect_violence(request):
     if request.method == 'POST':
         try:
-            data = json.loads(request.body)
-            image_data = data.get('image')
-        except Exception:
-            image_data = None
+            img, _ = read_image(request)
+        except FrameDecodeError:
+            img = None
 
-        if image_data:
+        if img is not None:
             try:
-                if ',' in image_data:
-                    image_data = image_data.split(',')[1]
-                image_bytes = base64.b64decode(image_data)
-                img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-                img_array = np.array(img)
-                result = analyzer.analyze_frame(img_array)
-                return JsonResponse({
-                    'is_violent': result['is_violent'],
-                    'confidence': result['violence_confidence'],
-                    'top_label': result['top_label'],
-                    'top_confidence': result['top_confidence'],
-                    'full_probs': result['full_probs']
-                })
+                return JsonResponse(predict_violence(np.array(img)))
             except Exception as e:
                 return JsonResponse({'error': f'Image processing error: {str(e)}'}, status=400)
     return JsonResponse({'error': 'Invalid request'}, status=400)
@@ -241,60 +390,201 @@ def detect_violence(request):
 def analyze_video(request):
     if request.method == 'POST' and request.FILES.get('video'):
         video = request.FILES['video']
-        temp_path = 'temp_video.mp4'
-        with open(temp_path, 'wb') as f:
+        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as f:
             for chunk in video.chunks():
                 f.write(chunk)
-        result = analyze_video_frames(temp_path)
-        os.remove(temp_path)
-        return JsonResponse(result)
+            temp_path = f.name
+        stream = request.GET.get('stream') == '1' or 'application/x-ndjson' in request.headers.get('Accept', '')
+        if stream:
+            response = StreamingHttpResponse(
+                RemoveFileOnClose(stream_video_results(temp_path), temp_path),
+                content_type='application/x-ndjson'
+            )
+            response['X-Accel-Buffering'] = 'no'
+            return response
+        try:
+            result = analyze_video_frames(temp_path)
+        finally:
+            os.remove(temp_path)
+        return JsonResponse(result, safe=False)
     return render(request, 'violence_app/analyze.html')
 
 
 def analyze_video_frames(video_path, sample_rate=10):
-    analyzer = VideoViolenceAnalyzer(sample_rate=sample_rate)
-    return analyzer.analyze_video(video_path)
+    return list(registry.get('clip').iter_video(video_path, sample_rate=sample_rate))
+
+
+def stream_video_results(video_path, sample_rate=10):
+    """
+    Yield NDJSON lines for each analyzed frame, then a summary line.
+    """
+    frames_analyzed = 0
+    try:
+        for result in registry.get('clip').iter_video(video_path, sample_rate=sample_rate):
+            frames_analyzed += 1
+            yield json.dumps(result) + '\n'
+        yield json.dumps({'done': True, 'frames_analyzed': frames_analyzed}) + '\n'
+    except Exception as e:
+        logger.error(f"Error streaming video analysis: {str(e)}")
+        yield json.dumps({'done': True, 'error': str(e), 'frames_analyzed': frames_analyzed}) + '\n'
+
+class RemoveFileOnClose:
+    """
+    Streaming response content that deletes a temporary file when the response is closed.
+
+    The server closes the response even if the client disconnected before the
+    first chunk, when a generator's ``finally`` would never run.
+    """
+
+    def __init__(self, iterator, path):
+        self.iterator = iterator
+        self.path = path
+
+    def __iter__(self):
+        return iter(self.iterator)
+
+    def close(self):
+        try:
+            self.iterator.close()
+        finally:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def submit_video_job(request):
+    """
+    Queue an uploaded video for background violence analysis and return its job id.
+    """
+    if not request.FILES.get('video'):
+        return JsonResponse({'error': 'No video file provided'}, status=400)
+    try:
+        sample_rate = max(1, int(request.POST.get('sample_rate', 10)))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid sample_rate'}, status=400)
+    status = jobs.submit_job(request.FILES['video'], sample_rate=sample_rate)
+    return JsonResponse(status, status=202)
+
+
+@require_http_methods(["GET"])
+def video_job_status(request, job_id):
+    status = jobs.get_status(job_id)
+    if status is None:
+        return JsonResponse({'error': 'Job not found'}, status=404)
+    return JsonResponse(status)
+
+
+@require_http_methods(["GET"])
+def video_job_result(request, job_id):
+    status = jobs.get_status(job_id)
+    if status is None:
+        return JsonResponse({'error': 'Job not found'}, status=404)
+    if status['status'] != jobs.COMPLETED:
+        return JsonResponse({'error': 'Job not completed', 'status': status['status']}, status=409)
+    return JsonResponse({'job_id': job_id, 'results': jobs.get_result(job_id)})
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def cancel_video_job(request, job_id):
+    status = jobs.cancel_job(job_id)
+    if status is None:
+        return JsonResponse({'error': 'Job not found'}, status=404)
+    return JsonResponse(status)
 
 @api_view(['POST'])
 def detect_deepfake(request):
     try:
-        if 'video' not in request.data:
-            return Response({'error': 'No video data provided'}, status=400)
-        video_data = request.data['video']
-        video_url = request.data.get('url', '')
         try:
-            processed_frame = preprocess_frame_deepfake(video_data)
-            if deepfake_model is None:
+            image, fields = read_image(request, field='video')
+            if registry.get('deepfake') is None:
                 return Response({'error': 'Deepfake model not loaded'}, status=500)
-            raw_prediction = float(deepfake_model.predict(processed_frame, verbose=0)[0][0])
-            smoothed_confidence = smooth_confidence(raw_prediction)
-            is_deepfake, final_confidence = make_deepfake_decision(smoothed_confidence)
-            DeepfakeDetection.objects.create(
-                is_deepfake=is_deepfake,
-                confidence=final_confidence,
-                video_url=video_url,
-                model_used='xception'
-            )
-            print(f"Debug - Raw: {raw_prediction:.4f}, Smoothed: {smoothed_confidence:.4f}, Final: {final_confidence:.4f}, Is Deepfake: {is_deepfake}")
-            return Response({
-                'is_deepfake': bool(is_deepfake),
-                'confidence': final_confidence,
-                'raw_prediction': raw_prediction,
-                'model': 'xception'
-            })
-        except ValueError as e:
-            return Response({'error': f'Invalid base64 data: {str(e)}'}, status=400)
+            stream_key = get_stream_key(request, fields)
+            return Response(predict_deepfake(image, fields.get('url', ''), stream_key=stream_key))
+        except FrameDecodeError as e:
+            return Response({'error': str(e)}, status=400)
         except Exception as e:
             return Response({'error': f'Error processing image: {str(e)}'}, status=500)
     except Exception as e:
         print(f"Error processing request: {str(e)}")
         return Response({'error': str(e)}, status=500)
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def analyze_frame(request):
+    """
+    Decode one frame once and run every requested detection head on it.
+
+    Accepts the frame in any common.frames input mode (``image`` data-URL in JSON,
+    multipart or raw bytes), an optional ``url`` identifying the stream and an
+    optional ``heads`` list (or comma-separated string) restricting which of
+    FRAME_HEADS are run. The deepfake head is only run for authenticated
+    requests, matching ``detect_deepfake``.
+    """
+    try:
+        image, fields = read_image(request)
+    except FrameDecodeError as e:
+        return Response({'error': str(e)}, status=400)
+    heads = fields.get('heads') or FRAME_HEADS
+    if isinstance(heads, str):
+        heads = [head.strip() for head in heads.split(',') if head.strip()]
+    unknown = [head for head in heads if head not in FRAME_HEADS]
+    if unknown:
+        return Response({'error': f'Unknown heads: {", ".join(unknown)}'}, status=400)
+
+    img_array = np.array(image)
+    digest = pixel_digest(img_array)
+    stream_key = get_stream_key(request, fields)
+
+    # Model heads reuse the stream's last results while the picture barely changes
+    change_detector = frame_changes.get(stream_key)
+    results = change_detector.reusable_results(img_array, [head for head in heads if head in REUSABLE_HEADS])
+    for head in heads:
+        if head in results:
+            continue
+        try:
+            if head == 'brainrot':
+                results[head] = predict_brainrot(image, digest)
+            elif head == 'violence':
+                results[head] = predict_violence(img_array, digest)
+            elif head == 'deepfake':
+                if not request.user.is_authenticated:
+                    results[head] = {'error': 'Authentication required'}
+                    continue
+                results[head] = predict_deepfake(image, fields.get('url', ''), stream_key=stream_key)
+            elif head == 'epilepsy':
+                stream = epilepsy_streams.get(stream_key)
+                results[head] = stream.update(img_array)
+            if head in REUSABLE_HEADS:
+                change_detector.remember(head, results[head])
+        except Exception as e:
+            logger.error(f"Error in analyze_frame ({head}): {str(e)}")
+            results[head] = {'error': str(e)}
+    return Response(results)
+
+@require_http_methods(["GET"])
+def batch_stats(request):
+    """
+    Report queue depth and batch sizes of the video model batchers.
+    """
+    return JsonResponse({
+        'brainrot': brainrot_batcher.stats(),
+        'deepfake': deepfake_batcher.stats()
+    })
+
+@require_http_methods(["GET"])
+def cache_stats(request):
+    """
+    Report hit and miss counters of the shared frame result cache.
+    """
+    return JsonResponse(get_frame_cache().stats())
+
 @api_view(['GET'])
 def get_deepfake_count(request):
     try:
-        count = DeepfakeDetection.objects.filter(is_deepfake=True).count()
-        return Response({'count': count})
+        return Response({'count': deepfake_count()})
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
@@ -305,99 +595,18 @@ def detect_epilepsy(request):
     Analyze video frames for flashing lights by detecting rapid brightness changes.
     """
     try:
-        # Parse request body
-        data = json.loads(request.body)
-        if 'image' not in data:
-            return JsonResponse({
-                'error': 'No image data provided'
-            }, status=400)
-            
-        # Decode base64 image
         try:
-            image_data = data['image']
-            if ',' in image_data:
-                image_data = image_data.split(',')[1]
-            image_bytes = base64.b64decode(image_data)
-            img = Image.open(io.BytesIO(image_bytes))
-            frame = np.array(img)
-        except Exception as e:
+            image, data = read_image(request)
+            frame = np.array(image)
+        except FrameDecodeError as e:
             logger.error(f"Error decoding image: {str(e)}")
             return JsonResponse({
-                'error': f'Invalid image data: {str(e)}'
+                'error': str(e)
             }, status=400)
             
-        # Convert to grayscale if needed
-        if len(frame.shape) == 3:
-            gray = np.mean(frame, axis=2)
-        else:
-            gray = frame
-            
-        # Calculate brightness
-        brightness = float(np.mean(gray))
-        
-        # Store brightness value
-        if not hasattr(detect_epilepsy, 'brightness_list'):
-            detect_epilepsy.brightness_list = []
-            detect_epilepsy.last_brightness = None
-            detect_epilepsy.flash_count = 0
-            detect_epilepsy.last_flash_time = 0
-            detect_epilepsy.frame_count = 0
-            detect_epilepsy.last_conclusion_time = 0
-        
-        detect_epilepsy.frame_count += 1
-        current_time = time.time()
-        
-        # Calculate brightness change
-        if detect_epilepsy.last_brightness is not None:
-            brightness_change = abs(brightness - detect_epilepsy.last_brightness)
-            
-            # Detect flash (significant brightness change)
-            if brightness_change > 50:  # Threshold for flash detection
-                # Only count flashes that are at least 100ms apart
-                if current_time - detect_epilepsy.last_flash_time > 0.1:
-                    detect_epilepsy.flash_count += 1
-                    detect_epilepsy.last_flash_time = current_time
-                    
-                    # If we detect 3 or more flashes in 1 second, consider it dangerous
-                    if detect_epilepsy.flash_count >= 3:
-                        detect_epilepsy.flash_count = 0  # Reset counter
-                        detect_epilepsy.last_conclusion_time = current_time
-                        return JsonResponse({
-                            'is_epilepsy_trigger': True,
-                            'result': 'Flashing Lights Detected',
-                            'confidence': 1.0,
-                            'frame_count': detect_epilepsy.frame_count,
-                            'status': 'analyzed'
-                        })
+        stream = epilepsy_streams.get(get_stream_key(request, data))
+        return JsonResponse(stream.update(frame))
         
-        detect_epilepsy.last_brightness = brightness
-        detect_epilepsy.brightness_list.append(brightness)
-        
-        # Keep only last 30 frames
-        if len(detect_epilepsy.brightness_list) > 30:
-            detect_epilepsy.brightness_list = detect_epilepsy.brightness_list[-30:]
-        
-        # If no flashes detected in the last 2 seconds, return a conclusion
-        if current_time - detect_epilepsy.last_conclusion_time > 2.0:
-            detect_epilepsy.last_conclusion_time = current_time
-            return JsonResponse({
-                'is_epilepsy_trigger': False,
-                'result': 'No Flashing Lights Detected',
-                'confidence': 1.0,
-                'frame_count': detect_epilepsy.frame_count,
-                'status': 'analyzed'
-            })
-        
-        # Return minimal response for frames being analyzed
-        return JsonResponse({
-            'is_epilepsy_trigger': False,
-            'status': 'analyzing'
-        })
-        
-    except json.JSONDecodeError:
-        return JsonResponse({
-            'error': 'Invalid JSON data'
-        }, status=400)
     except Exception as e:
         logger.error(f"Error in detect_epilepsy: {str(e)}")
         return JsonResponse({
@@ -7,7 +7,6 @@ const VIOLENCE_COOLDOWN = 15000; // ms
 const DEEPFAKE_COOLDOWN = 20000; // ms
 const ANALYSIS_INTERVAL = 2000; // ms (how often to try analyzing a frame)
 const VIOLENCE_THRESHOLD = 0.5;
-const FLASH_FRAME_INTERVAL = 5000; // ms (check for flashing lights every 5 seconds)
 const FLASH_COOLDOWN = 5000; // ms (minimum time between flash detection requests)
 
 // --- STATE ---
@@ -86,70 +85,62 @@ function removeBadge(video, type) {
     video.parentElement.querySelectorAll('.fused-badge-' + type).forEach(b => b.remove());
 }
 
-function captureFrame(video) {
-    try {
-        const canvas = document.createElement("canvas");
-        canvas.width = video.videoWidth;
-        canvas.height = video.videoHeight;
-        const ctx = canvas.getContext("2d");
-        ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
-        return canvas.toDataURL("image/jpeg");
-    } catch (error) {
-        console.error("❌ Error capturing frame:", error);
-        return null;
-    }
+function captureFrameBlob(video) {
+    return new Promise((resolve) => {
+        try {
+            const canvas = document.createElement("canvas");
+            canvas.width = video.videoWidth;
+            canvas.height = video.videoHeight;
+            const ctx = canvas.getContext("2d");
+            ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
+            canvas.toBlob(resolve, "image/jpeg");
+        } catch (error) {
+            console.error("❌ Error capturing frame:", error);
+            resolve(null);
+        }
+    });
 }
 
 // --- API CALLS (Promise-based) ---
-function fetchBrainrot(frame) {
-    return fetch("http://127.0.0.1:8000/video/brainrot/", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ image: frame }),
-    })
-        .then(res => res.json())
-        .then(data => ({
-            is_brainrot: data.label === "Brainrot",
-            confidence: data.confidence
-        }))
-        .catch(() => ({ is_brainrot: false, confidence: 0 }));
-}
+async function handleFlashResult(video, flashData) {
+    // Only show badge for final results or errors
+    if (flashData.is_flash_trigger) {
+        overlayBadge(video, 'flash', `⚡ Flashing Lights Detected`);
+        applyRedFilter(video, true);
+    } else if (flashData.status === 'error') {
+        overlayBadge(video, 'flash', `⚠️ ${flashData.result}`);
+    } else {
+        removeBadge(video, 'flash');
+        applyRedFilter(video, false);
+    }
 
-function fetchViolence(frame) {
-    return fetch("http://127.0.0.1:8000/video/violence/", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ image: frame }),
-    })
-        .then(res => res.json())
-        .then(data => ({
-            is_violence: data.is_violent,
-            confidence: data.confidence
-        }))
-        .catch(() => ({ is_violence: false, confidence: 0 }));
-}
+    // Send results to popup
+    chrome.runtime.sendMessage({
+        type: 'VIDEO_ANALYSIS_RESULTS',
+        data: { flash: flashData }
+    });
 
-async function fetchDeepfake(frame, video) {
+    // POST flash detection to monitoring backend
     try {
-        // Get the auth token from storage
-        const token = await new Promise((resolve) => {
-            chrome.storage.local.get(['authToken'], (result) => {
-                resolve(result.authToken);
-            });
-        });
-
-        if (!token) {
-            console.error('No authentication token found for deepfake detection');
-            return { is_deepfake: false, confidence: 0 };
-        }
+        const storage = await new Promise(resolve => chrome.storage.local.get(['activeChildId'], resolve));
+        const activeChildId = storage.activeChildId || 1;
+
+        const payload = {
+            child_id: activeChildId,
+            type: 'flash',
+            result: {
+                is_epilepsy_trigger: flashData.is_flash_trigger,
+                result: flashData.result,
+                confidence: flashData.confidence,
+                frame_count: flashData.frame_count,
+                status: flashData.status
+            }
+        };
 
-        const response = await fetch("http://127.0.0.1:8000/video/deepfake/", {
-            method: "POST",
-            headers: {
-                "Content-Type": "application/json",
-                "Authorization": `Token ${token}`
-            },
-            body: JSON.stringify({ video: frame, url: video.src || window.location.href }),
+        const response = await fetch('http://127.0.0.1:8000/monitoring/log-detection/', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(payload)
         });
 
         if (!response.ok) {
@@ -157,81 +148,105 @@ async function fetchDeepfake(frame, video) {
         }
 
         const data = await response.json();
-        return {
-            is_deepfake: data.is_deepfake,
-            confidence: data.confidence
-        };
+        console.log('[Flash] Detection logged:', data);
     } catch (error) {
-        console.error("Error in deepfake detection:", error);
-        return { is_deepfake: false, confidence: 0 };
+        console.error('[Flash] Error logging detection:', error);
     }
 }
 
-async function fetchFlashDetection(frame) {
-    try {
-        console.log('[Flash] Sending frame for analysis');
-        const response = await fetch("http://127.0.0.1:8000/video/epilepsy/", {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            },
-            body: JSON.stringify({ image: frame })
+async function fetchAnalyzeFrame(frameBlob, video, heads) {
+    // Send the JPEG bytes as-is; the other fields travel in the query string
+    const headers = { "Content-Type": "image/jpeg" };
+    const token = await new Promise((resolve) => {
+        chrome.storage.local.get(['authToken'], (result) => {
+            resolve(result.authToken);
         });
+    });
+    if (token) {
+        headers["Authorization"] = `Token ${token}`;
+    }
 
-        console.log('[Flash] Response status:', response.status);
+    try {
+        const params = new URLSearchParams({
+            url: video.src || window.location.href,
+            heads: heads.join(',')
+        });
+        const response = await fetch(`http://127.0.0.1:8000/video/analyze-frame/?${params}`, {
+            method: "POST",
+            headers,
+            body: frameBlob,
+        });
         const data = await response.json();
-        console.log('[Flash] Response data:', data);
-
         if (!response.ok) {
             throw new Error(data.error || `HTTP error! status: ${response.status}`);
         }
-
-        return {
-            is_flash_trigger: data.is_epilepsy_trigger || false,
-            result: data.result || 'Unknown',
-            confidence: data.confidence || 0,
-            status: data.status || 'error',
-            frame_count: data.frame_count || 0
-        };
+        return data;
     } catch (error) {
-        console.error('[Flash] Error:', error);
-        if (error.message === 'Failed to fetch') {
-            return {
-                is_flash_trigger: false,
-                result: 'Server connection error. Please ensure the server is running.',
-                confidence: 0,
-                status: 'error',
-                frame_count: 0
-            };
-        }
+        console.error("Error in combined frame analysis:", error);
+        return { error: error.message };
+    }
+}
+
+function toBrainrotResult(data) {
+    if (!data || data.error) return { is_brainrot: false, confidence: 0 };
+    return { is_brainrot: data.label === "Brainrot", confidence: data.confidence };
+}
+
+function toViolenceResult(data) {
+    if (!data || data.error) return { is_violence: false, confidence: 0 };
+    return { is_violence: data.is_violent, confidence: data.confidence };
+}
+
+function toDeepfakeResult(data) {
+    if (!data || data.error) return { is_deepfake: false, confidence: 0 };
+    return { is_deepfake: data.is_deepfake, confidence: data.confidence };
+}
+
+function toFlashResult(data, requestError) {
+    if (requestError || !data || data.error) {
+        const message = requestError || (data && data.error) || 'Unknown';
         return {
             is_flash_trigger: false,
-            result: `Error: ${error.message}`,
+            result: message === 'Failed to fetch'
+                ? 'Server connection error. Please ensure the server is running.'
+                : `Error: ${message}`,
             confidence: 0,
             status: 'error',
             frame_count: 0
         };
     }
+    return {
+        is_flash_trigger: data.is_epilepsy_trigger || false,
+        result: data.result || 'Unknown',
+        confidence: data.confidence || 0,
+        status: data.status || 'error',
+        frame_count: data.frame_count || 0
+    };
 }
 
 function startVideoAnalysis(video) {
     if (video.dataset.fusedChecked) return;
     video.dataset.fusedChecked = "true";
     let analysisIntervalId;
-    let flashIntervalId;
     let lastFlashCheck = 0;
 
     function analysisLoop() {
         if (!video.paused && !video.ended && isTabActiveAndVisible()) {
-            const frame = captureFrame(video);
-            if (frame) {
-                // Run other analyses immediately
-                Promise.all([
-                    fetchBrainrot(frame),
-                    fetchViolence(frame),
-                    fetchDeepfake(frame, video)
-                ]).then(([brainrot, violence, deepfake]) => {
+            captureFrameBlob(video).then((frameBlob) => {
+                if (!frameBlob) return;
+                // One request per frame; the flash head rides along at its own cadence
+                const heads = ['brainrot', 'violence', 'deepfake'];
+                const now = Date.now();
+                const checkFlash = now - lastFlashCheck >= FLASH_COOLDOWN;
+                if (checkFlash) {
+                    lastFlashCheck = now;
+                    heads.push('epilepsy');
+                }
+
+                return fetchAnalyzeFrame(frameBlob, video, heads).then((data) => {
+                    const brainrot = toBrainrotResult(data.brainrot);
+                    const violence = toViolenceResult(data.violence);
+                    const deepfake = toDeepfakeResult(data.deepfake);
                     console.log('[video_script.js] Sending VIDEO_ANALYSIS_RESULTS:', { brainrot, violence, deepfake });
                     chrome.runtime.sendMessage({
                         type: 'VIDEO_ANALYSIS_RESULTS',
@@ -264,83 +279,21 @@ function startVideoAnalysis(video) {
                     } else {
                         removeBadge(video, 'deepfake');
                     }
-                });
-            }
-        }
-    }
 
-    function flashDetectionLoop() {
-        if (!video.paused && !video.ended && isTabActiveAndVisible()) {
-            const now = Date.now();
-            // Only check for flashes if enough time has passed since last check
-            if (now - lastFlashCheck >= FLASH_COOLDOWN) {
-                const frame = captureFrame(video);
-                if (frame) {
-                    lastFlashCheck = now;
-                    fetchFlashDetection(frame).then(async flashData => {
-                        // Only show badge for final results or errors
-                        if (flashData.is_flash_trigger) {
-                            overlayBadge(video, 'flash', `⚡ Flashing Lights Detected`);
-                            applyRedFilter(video, true);
-                        } else if (flashData.status === 'error') {
-                            overlayBadge(video, 'flash', `⚠️ ${flashData.result}`);
-                        } else {
-                            removeBadge(video, 'flash');
-                            applyRedFilter(video, false);
-                        }
-
-                        // Send results to popup
-                        chrome.runtime.sendMessage({
-                            type: 'VIDEO_ANALYSIS_RESULTS',
-                            data: { flash: flashData }
-                        });
-
-                        // POST flash detection to monitoring backend
-                        try {
-                            const storage = await new Promise(resolve => chrome.storage.local.get(['activeChildId'], resolve));
-                            const activeChildId = storage.activeChildId || 1;
-                            
-                            const payload = {
-                                child_id: activeChildId,
-                                type: 'flash',
-                                result: {
-                                    is_epilepsy_trigger: flashData.is_flash_trigger,
-                                    result: flashData.result,
-                                    confidence: flashData.confidence,
-                                    frame_count: flashData.frame_count,
-                                    status: flashData.status
-                                }
-                            };
-
-                            const response = await fetch('http://127.0.0.1:8000/monitoring/log-detection/', {
-                                method: 'POST',
-                                headers: { 'Content-Type': 'application/json' },
-                                body: JSON.stringify(payload)
-                            });
-
-                            if (!response.ok) {
-                                throw new Error(`HTTP error! status: ${response.status}`);
-                            }
-
-                            const data = await response.json();
-                            console.log('[Flash] Detection logged:', data);
-                        } catch (error) {
-                            console.error('[Flash] Error logging detection:', error);
-                        }
-                    });
-                }
-            }
+                    if (checkFlash) {
+                        handleFlashResult(video, toFlashResult(data.epilepsy, data.error));
+                    }
+                });
+            });
         }
     }
 
     video.addEventListener("playing", () => {
         analysisIntervalId = setInterval(analysisLoop, ANALYSIS_INTERVAL);
-        flashIntervalId = setInterval(flashDetectionLoop, FLASH_FRAME_INTERVAL);
     });
 
     video.addEventListener("pause", () => {
         clearInterval(analysisIntervalId);
-        clearInterval(flashIntervalId);
         removeBadge(video, 'brainrot');
         removeBadge(video, 'violence');
         removeBadge(video, 'deepfake');
@@ -351,7 +304,6 @@ function startVideoAnalysis(video) {
 
     video.addEventListener("ended", () => {
         clearInterval(analysisIntervalId);
-        clearInterval(flashIntervalId);
         removeBadge(video, 'brainrot');
         removeBadge(video, 'violence');
         removeBadge(video, 'deepfake');